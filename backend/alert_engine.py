@@ -1,6 +1,12 @@
 import uuid
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 
+try:
+    import numpy as np
+except ImportError:  # only needed for the columnar batch path
+    np = None
+
 class VolumeAlert:
     def __init__(self, symbol, operator, right_type, right_value=None):
         self.symbol = symbol
@@ -45,21 +51,116 @@ class VolumeAlert:
         self.triggered = True
 
 
+# Global toggle that must be on for each alert type to fire
+ALERT_TYPE_SETTING = {
+    "PREV_DAY": "above_prev_day",
+    "WEEKLY_AVG": "above_weekly_avg",
+    "MONTHLY_AVG": "above_monthly_avg",
+    "MULTIPLIER_WEEKLY": "above_weekly_avg",
+}
+
+
+def alert_enabled(alert, settings):
+    key = ALERT_TYPE_SETTING.get(alert.right_type)
+    return key is None or bool(settings.get(key))
+
+
+class AlertThresholdIndex:
+    """
+    Per-symbol untriggered user alerts sorted by resolved threshold.
+    A tick bisects on live_volume and pops exactly the alerts it crossed.
+    Symbols are rebuilt lazily after invalidate() (alerts, metrics or settings changed).
+    """
+
+    def __init__(self):
+        self.keys = {}      # symbol -> sorted thresholds
+        self.entries = {}   # symbol -> [(alert, inclusive)] aligned with keys
+
+    def invalidate(self, symbol=None):
+        if symbol is None:
+            self.keys.clear()
+            self.entries.clear()
+        else:
+            self.keys.pop(symbol, None)
+            self.entries.pop(symbol, None)
+
+    def _build(self, symbol, alerts, row, settings):
+        items = []
+        for alert in alerts:
+            if alert.triggered or alert.operator not in (">", ">="):
+                continue
+            if not alert_enabled(alert, settings):
+                continue
+            try:
+                rhs = alert._resolve_rhs(None, row)
+                if rhs is None:
+                    continue
+                rhs = float(rhs)
+            except (TypeError, ValueError):
+                continue
+            items.append((rhs, alert.operator == ">=", alert))
+
+        items.sort(key=lambda item: item[0])
+        self.keys[symbol] = [item[0] for item in items]
+        self.entries[symbol] = [(item[2], item[1]) for item in items]
+
+    def crossed(self, symbol, volume, alerts, row, settings):
+        """Remove and return the alerts that `volume` crosses."""
+        if symbol not in self.keys:
+            self._build(symbol, alerts, row, settings)
+
+        keys = self.keys[symbol]
+        if not keys or volume < keys[0]:
+            return []
+
+        entries = self.entries[symbol]
+        below = bisect_left(keys, volume)     # threshold < volume: fires for > and >=
+        upto = bisect_right(keys, volume)     # threshold == volume: fires for >= only
+
+        fired = [alert for alert, _ in entries[:below]]
+        kept = []
+        for alert, inclusive in entries[below:upto]:
+            (fired if inclusive else kept).append(alert)
+
+        del keys[:upto]
+        del entries[:upto]
+        if kept:
+            keys[0:0] = [volume] * len(kept)
+            entries[0:0] = [(alert, False) for alert in kept]
+
+        return fired
+
+
+# z-score cut-offs for the volume intensity label
+INTENSITY_HIGH = 1.0
+INTENSITY_VERY_HIGH = 2.0
+
+
+def intensity_for(z):
+    if z is None:
+        return "WAITING"
+    if z < INTENSITY_HIGH:
+        return "NORMAL"
+    if z < INTENSITY_VERY_HIGH:
+        return "HIGH"
+    return "VERY HIGH"
+
+
 class AlertEngine:
     def __init__(self, notifier):
         self.notifier = notifier
 
-    def evaluate(self, symbol, row, storage):
-        self.evaluate_window_spike(symbol, row, storage)
+    def evaluate(self, symbol, row, storage, now=None):
+        self.evaluate_window_spike(symbol, row, storage, now)
         self.evaluate_user_alerts(symbol, row, storage)
 
     # ---------------- WINDOW SPIKE ----------------
 
-    def evaluate_window_spike(self, symbol, row, storage):
+    def evaluate_window_spike(self, symbol, row, storage, now=None):
         if symbol in storage.window_alerted_today:
             return
 
-        now = datetime.now().time()
+        now = (now or datetime.now()).time()
         start = storage.window_start_time
         end = storage.window_end_time
 
@@ -115,20 +216,14 @@ class AlertEngine:
             z_time = (vol - expected_volume) / expected_std
 
         row["window_zscore"] = round(z_time, 2)
-
-        # Adjusted thresholds for better sensitivity
-        if z_time < 0.5:
-            row["volume_intensity"] = "NORMAL"
-        elif z_time < 1.5:
-            row["volume_intensity"] = "HIGH"
-        else:
-            row["volume_intensity"] = "VERY HIGH"
+        row["volume_intensity"] = intensity_for(z_time)
 
         # print(f"DEBUG: {symbol} z={z_time:.2f} intensity={row['volume_intensity']}")
 
         # Trigger the alert state but only notify if we are inside the window
         if z_time >= 2.0:
             row["window_alert_hit"] = True
+            row["is_red_alert"] = True
             
             # 🔥 ONLY notify if we are actually currently inside the window (live monitoring)
             # This prevents "past alerts" from spamming when settings are applied at 15:41 PM
@@ -139,6 +234,94 @@ class AlertEngine:
                     f"UNUSUAL VOLUME | z={z_time:.2f} | vol={vol:,.0f}"
                 )
 
+    # ---------------- WINDOW SPIKE (BATCH) ----------------
+
+    def evaluate_window_batch(self, symbols, storage, now=None):
+        """
+        Window-spike z-scores for many symbols at once (one ingest micro-batch).
+        Vectorized over the columnar store; dict-backed storage falls back to per-row.
+        """
+        if now is None:
+            now = datetime.now()
+
+        if not storage.columnar:
+            for symbol in symbols:
+                row = storage.symbol_data.get(symbol)
+                if row:
+                    self.evaluate_window_spike(symbol, row, storage, now)
+            return
+
+        store = storage.symbol_data
+        alerted = storage.window_alerted_today
+        pending = [s for s in symbols if s in store.ids and s not in alerted]
+        if not pending:
+            return
+
+        start = storage.window_start_time
+        end = storage.window_end_time
+        if not start or not end:
+            return
+
+        ids = np.fromiter((store.ids[s] for s in pending), dtype=np.intp, count=len(pending))
+        now_time = now.time()
+
+        # If we haven't reached the start yet, show WAITING
+        if now_time < start:
+            store.assign("volume_intensity", ids, store.category_code("volume_intensity", "WAITING"))
+            return
+
+        # Clamp to the end of the window, same minute arithmetic as evaluate_window_spike
+        calc_now = min(now_time, end)
+        start_minutes = start.hour * 60 + start.minute
+        elapsed_in_window = max(1, calc_now.hour * 60 + calc_now.minute - start_minutes)
+
+        total_window = storage.window_minutes()
+        if not total_window:
+            return
+
+        mean = store.columns["window_mean"][ids]
+        std = store.columns["window_std"][ids]
+        vol = store.columns["window_volume"][ids]
+
+        valid = ~np.isnan(mean) & (mean != 0) & ~np.isnan(std) & (std != 0)
+        if not valid.any():
+            return
+
+        ids, mean, std, vol = ids[valid], mean[valid], std[valid], vol[valid]
+
+        expected_volume = mean * (elapsed_in_window / total_window)
+        z = (vol - expected_volume) / std
+
+        store.assign("window_zscore", ids, np.round(z, 2))
+        code = lambda label: store.category_code("volume_intensity", label)
+        store.assign("volume_intensity", ids, np.select(
+            [z < INTENSITY_HIGH, z < INTENSITY_VERY_HIGH],
+            [code("NORMAL"), code("HIGH")],
+            code("VERY HIGH")
+        ))
+
+        # Only the symbols that crossed the 2.0 threshold go back to Python
+        hit = z >= 2.0
+        if not hit.any():
+            return
+
+        store.assign("window_alert_hit", ids[hit], True)
+        store.assign("is_red_alert", ids[hit], True)
+
+        # 🔥 ONLY notify if we are actually currently inside the window
+        if now_time > end:
+            return
+
+        for row_id, z_time, v in zip(ids[hit].tolist(), z[hit].tolist(), vol[hit].tolist()):
+            symbol = store.symbols_by_id[row_id]
+            if symbol in alerted:
+                continue
+            alerted.add(symbol)
+            self.notifier.notify(
+                symbol,
+                f"UNUSUAL VOLUME | z={z_time:.2f} | vol={v:,.0f}"
+            )
+
     # ---------------- USER ALERTS ----------------
 
     def evaluate_user_alerts(self, symbol, row, storage):
@@ -146,24 +329,20 @@ class AlertEngine:
         if not alerts:
             return
 
-        settings = storage.alert_settings
-        for alert in alerts:
-            # Skip if the corresponding alert type is disabled globally
-            if alert.right_type == "PREV_DAY" and not settings.get("above_prev_day"):
-                continue
-            if alert.right_type == "WEEKLY_AVG" and not settings.get("above_weekly_avg"):
-                continue
-            if alert.right_type == "MONTHLY_AVG" and not settings.get("above_monthly_avg"):
-                continue
-            if alert.right_type == "MULTIPLIER_WEEKLY" and not settings.get("above_weekly_avg"):
-                continue
+        fired = storage.alert_index.crossed(
+            symbol, row["live_volume"], alerts, row, storage.alert_settings
+        )
 
-            if alert.should_trigger(row["live_volume"], row):
-                alert.mark_triggered()
-                row["user_alert_hit"] = True
-                row["status"] = "ALERT"
+        for alert in fired:
+            alert.mark_triggered()
+            row["user_alert_hit"] = True
+            row["is_red_alert"] = True
 
-                self.notifier.notify(
-                    symbol,
-                    f"USER ALERT TRIGGERED | {alert.operator} {alert.right_type}"
-                )
\ No newline at end of file
+            self.notifier.notify(
+                symbol,
+                f"USER ALERT TRIGGERED | {alert.operator} {alert.right_type}"
+            )
+
+        if fired:
+            storage.update_status(symbol)
+            storage.publish_alerts()
@@ -1,42 +1,111 @@
+import csv
+import hashlib
+import io
+import json
 import os
+import queue
 import threading
-from datetime import datetime
-from flask import Flask, jsonify, render_template, request
+from datetime import date, datetime
+from flask import Flask, Response, jsonify, render_template, request
 from flask_cors import CORS
 
 from storage import Storage
 from websocket_client import MTWebSocketClient
 from marketdata_handler import MarketDataHandler
-from config import NIFTY50_STOCKS
+import config
+from config import COLUMNAR_STATE, WARM_START
 from alert_engine import VolumeAlert
 from historical_volume import HistoricalVolumeLoader
-
-storage = Storage()
+from stream_hub import StreamHub, RESYNC, format_sse
+from snapshot import project_rows
+from series_cache import SeriesCache, lttb, slice_range
+from response_cache import ResponseCache
+from wire_formats import MIME_JSON, available_formats
+from event_log import KIND_ALERT, KIND_STOCK
+from backfill_scheduler import BackfillScheduler
+from warm_start import StartupTimer, DeferredTasks, history_fingerprint, load_snapshot, save_snapshot
+
+timer = StartupTimer()
+deferred = DeferredTasks()
+
+storage = Storage(columnar=COLUMNAR_STATE)
+hub = StreamHub()
+storage.hub = hub
+series_cache = SeriesCache()
+response_cache = ResponseCache()
 handler = MarketDataHandler(storage=storage)
 ws = MTWebSocketClient(market_handler=handler)
 
-from scripts.ingest_bhavcopy import run_auto_ingest, backfill_symbol
+from scripts.ingest_bhavcopy import run_auto_ingest
 import scripts.ingest_bhavcopy as ingest_bhavcopy
 import token_lookup
 import extract_token_no
 
-# ---- Load historical data ----
-loader = HistoricalVolumeLoader("data/historical_volumes.json")
-hist = loader.load()
+# Deferred startup work, the auto-ingest thread and the backfill scheduler all save
+warm_snapshot_lock = threading.Lock()
+
+def save_warm_snapshot():
+    """Bring the loader up to date with the store and rewrite the warm-start snapshot."""
+    if not WARM_START:
+        return
+    with warm_snapshot_lock:
+        # Holding the store lock keeps new rows out until the metrics and the
+        # fingerprint they are validated against have both been taken
+        with loader.lock, loader.store.lock:
+            loader.refresh()
+            history = history_fingerprint(loader.store)
+            metrics = dict(loader.metrics)
+            last_market_date = loader.last_market_date
+        save_snapshot(loader.store, metrics, last_market_date, stocks, history=history)
+
+# One worker for every /add-stock backfill (dates are fetched once per batch of symbols);
+# the warm snapshot is rewritten whenever it goes idle so a restart stays warm
+backfill_scheduler = BackfillScheduler(on_idle=save_warm_snapshot)
 
-monitored_symbols = {s["symbol"].strip().upper() for s in NIFTY50_STOCKS}
-for symbol, metrics in hist.items():
-    clean_sym = symbol.strip().upper()
-    if clean_sym in monitored_symbols:
-        storage.set_historical_metrics(clean_sym, metrics)
+# ---- Load historical data ----
+# Same HistoryStore the ingest script writes to (migrates the old JSON once)
+with timer.phase("open history store"):
+    loader = HistoricalVolumeLoader(ingest_bhavcopy.get_store())
+
+# Warm start: precomputed metrics + token map, if still valid for the sources
+warm = None
+if WARM_START:
+    with timer.phase("load warm snapshot"):
+        warm = load_snapshot(loader.store)
+
+if warm:
+    timer.mode = "warm"
+    hist = loader.restore(warm["metrics"], warm["last_market_date"])
+    stocks = warm["stocks"]
+else:
+    with timer.phase("compute metrics"):
+        hist = loader.load()
+    with timer.phase("parse contracts"):
+        stocks = config.load_nifty50_stocks()
+
+with timer.phase("register stocks"):
+    monitored_symbols = {s["symbol"].strip().upper() for s in stocks}
+    with storage.lock:
+        for symbol, metrics in hist.items():
+            clean_sym = symbol.strip().upper()
+            if clean_sym in monitored_symbols:
+                storage.set_historical_metrics(clean_sym, metrics)
+
+        for stock in stocks:
+            token = stock["token"]
+            symbol = stock["symbol"]
+            exchange = stock["exchange"]
+
+            storage.register_stock(symbol=symbol, token=token, log=False)
+            ws.add_subscription(symbol=symbol, token=token, exchange=exchange)
 
-for stock in NIFTY50_STOCKS:
-    token = stock["token"]
-    symbol = stock["symbol"]
-    exchange = stock["exchange"]
+with timer.phase("publish snapshot"):
+    storage.publish_snapshot(force=True)
 
-    storage.register_stock(symbol=symbol, token=token, log=False)
-    ws.add_subscription(symbol=symbol, token=token, exchange=exchange)
+# ---- Non-critical work, run once the server is starting ----
+if not warm:
+    deferred.add("save warm snapshot", save_warm_snapshot)
+deferred.add("build symbol index", token_lookup.get_index)
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
@@ -50,9 +119,25 @@ def index():
         "port": 7000
     })
 
+def cached_json(build, mimetype=MIME_JSON):
+    """
+    Serve build(snapshot) through the response cache: serialized (and compressed)
+    once per snapshot version per URL, 304 when the client's ETag is current.
+    """
+    snap = storage.snapshot
+    return response_cache.respond(snap.version, request.full_path, lambda: build(snap), request, mimetype)
+
 @app.route("/logs")
 def logs():
-    return jsonify(storage.get_logs())
+    since = request.args.get("since", type=int)
+    symbol = request.args.get("symbol")
+    kind = request.args.get("kind")
+
+    if since is None and not symbol and not kind:
+        return cached_json(lambda snap: list(snap.logs))
+
+    # Cursor mode: only entries after `since`, optionally filtered
+    return cached_json(lambda snap: snap.log_changes(since, symbol, kind))
 
 @app.route("/add-alert", methods=["POST"])
 def add_alert():
@@ -71,22 +156,26 @@ def add_alert():
             right_value=data.get("right_value")
         )
 
-        storage.add_alert(symbol, alert)
-        
-        row = storage.symbol_data.get(symbol)
-
-        # Defensive check for immediate trigger
-        if row and row.get("live_volume") is not None:
-            try:
-                if alert.should_trigger(row["live_volume"], row):
-                    alert.mark_triggered()
-                    row["user_alert_hit"] = True
-                    row["is_red_alert"] = True
-                    storage.add_log(f"ALERT TRIGGERED IMMEDIATELY: {symbol}")
-            except Exception as eval_err:
-                print(f"Error evaluating immediate trigger: {eval_err}")
+        with storage.lock:
+            storage.add_alert(symbol, alert)
+
+            row = storage.symbol_data.get(symbol)
+
+            # Defensive check for immediate trigger
+            if row and row.get("live_volume") is not None:
+                try:
+                    if alert.should_trigger(row["live_volume"], row):
+                        alert.mark_triggered()
+                        row["user_alert_hit"] = True
+                        row["is_red_alert"] = True
+                        storage.touch(symbol)
+                        storage.update_status(symbol)
+                        storage.publish_alerts()
+                        storage.add_log(f"ALERT TRIGGERED IMMEDIATELY: {symbol}", symbol=symbol, kind=KIND_ALERT)
+                except Exception as eval_err:
+                    print(f"Error evaluating immediate trigger: {eval_err}")
     
-        storage.add_log(f"ALERT CREATED: {symbol}")
+        storage.add_log(f"ALERT CREATED: {symbol}", symbol=symbol, kind=KIND_ALERT)
         return jsonify({"status": "ok"})
 
     except Exception as e:
@@ -104,18 +193,7 @@ def add_alert():
 
 @app.route("/alerts")
 def get_alerts():
-    result = []
-    for symbol, alerts in storage.alerts.items():
-        for a in alerts:
-            result.append({
-                "id": a.id,
-                "symbol": a.symbol,
-                "operator": a.operator,
-                "right_type": a.right_type,
-                "right_value": a.right_value,
-                "triggered": a.triggered
-            })
-    return jsonify(result)
+    return cached_json(lambda snap: list(snap.alerts))
 
 
 @app.route("/remove-alert", methods=["POST"])
@@ -131,18 +209,46 @@ def remove_alert():
 
 @app.route("/historical/<symbol>")
 def historical(symbol):
-    row = storage.symbol_data.get(symbol)
-
-    if not row:
+    if symbol not in storage.symbol_data:
         return jsonify([])
 
-    series = row.get("historical_series")
+    series = storage.historical_series.get(symbol)
     if not series:
-        storage.add_log(f"No historical data for {symbol}")
-    if not isinstance(series, list):
+        storage.add_log(f"No historical data for {symbol}", symbol=symbol)
+    if not isinstance(series, list) or not series:
         return jsonify([])
 
-    return jsonify(series)
+    # Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD range and ?max_points=N (LTTB downsampling)
+    try:
+        start, end = (
+            date.fromisoformat(v).isoformat() if v else None
+            for v in (request.args.get("from"), request.args.get("to"))
+        )
+    except ValueError:
+        return jsonify({"status": "error", "message": "from/to must be YYYY-MM-DD"}), 400
+    max_points = request.args.get("max_points", type=int)
+
+    # Same last ingested date + length means same data: let the browser revalidate with a 304.
+    # The tag is a hash of the parsed values, so no request text ends up in the header.
+    last_date = series[-1]["time"]
+    key = (symbol, last_date, len(series), start, end, max_points)
+    etag = hashlib.sha1(repr(key).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    def build():
+        points = slice_range(series, start, end)
+        if max_points:
+            points = lttb(points, max_points)
+        return json.dumps(points)
+
+    body = series_cache.get(key, build)
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
 
 @app.route("/set-time-range", methods=["POST"])
 def set_time_range():
@@ -166,21 +272,92 @@ def alert_settings():
     
     return jsonify(storage.alert_settings)
 
+def _csv_arg(name, upper=False):
+    raw = request.args.get(name, "")
+    values = [v.strip() for v in raw.split(",") if v.strip()]
+    return {v.upper() for v in values} if upper else values
+
 @app.route("/data")
 def data():
-    return jsonify(storage.get_all_volumes())
+    """
+    Market rows. Optional ?fields=a,b projection, ?symbols=X,Y filter and
+    ?since=<cursor> for incremental updates. Series data lives in /historical.
+    Accept header picks JSON (default), the VAC1 columnar binary or msgpack.
+    """
+    since = request.args.get("since", type=int)
+    fields = _csv_arg("fields")
+    symbols = _csv_arg("symbols", upper=True)
+    mimetype = request.accept_mimetypes.best_match(available_formats()) or MIME_JSON
+
+    if since is None:
+        return cached_json(lambda snap: project_rows(snap.rows, fields, symbols), mimetype)
+
+    # Incremental mode: only rows changed after the client's cursor
+    def build(snap):
+        changes = snap.changes(since)
+        if fields or symbols:
+            changes["rows"] = project_rows(changes["rows"], fields, symbols)
+        if symbols:
+            changes["removed"] = [s for s in changes["removed"] if s in symbols]
+        return changes
+
+    return cached_json(build, mimetype)
+
+@app.route("/stream")
+def stream():
+    """
+    Server-sent events: "rows" (same shape as /data?since=), "log", "logs" and "alerts".
+    Each connection starts with a full snapshot and then receives pushes.
+    """
+    q = hub.subscribe()
+
+    def snapshot():
+        snap = storage.snapshot
+        yield format_sse("rows", snap.changes(None))
+        yield format_sse("logs", list(snap.logs))
+        yield format_sse("alerts", list(snap.alerts))
+
+    def generate():
+        try:
+            yield from snapshot()
+            while True:
+                try:
+                    message = q.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is RESYNC:
+                    yield from snapshot()
+                else:
+                    yield message
+        finally:
+            hub.unsubscribe(q)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
 
 @app.route("/available-symbols")
 def available_symbols():
     """
-    Returns all available NSE EQ symbols from NSECM.xml.
-    Results are cached for performance.
+    Searches the available NSE EQ symbols (indexed once from all_symbols.json).
+    ?q= type-ahead query, ?limit=/&offset= paging, ?fuzzy=1 adds close matches.
+    `count` is the total number of matches, `symbols` only the requested page.
     """
     try:
-        symbols = token_lookup.get_all_symbols()
+        q = request.args.get("q", "")
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        fuzzy = request.args.get("fuzzy", "0") == "1"
+
+        total, symbols = token_lookup.search_symbols(q, limit=limit, offset=offset, fuzzy=fuzzy)
         return jsonify({
             "status": "ok",
-            "count": len(symbols),
+            "count": total,
+            "offset": offset,
+            "limit": limit,
+            "has_more": offset + len(symbols) < total,
             "symbols": symbols
         })
     except Exception as e:
@@ -190,15 +367,81 @@ def available_symbols():
             "message": str(e)
         }), 500
 
+def remove_new_symbol(symbol, is_existing):
+    """Undo the immediate registration of a symbol whose backfill did not validate."""
+    if not is_existing:
+        token_removed = storage.remove_stock(symbol)
+        if token_removed:
+            ws.remove_subscription(token_removed)
+
+def finish_backfill(symbol, days, is_existing, success):
+    """Validate a finished backfill job and load its metrics (runs on the scheduler thread)."""
+    try:
+        if not success:
+            storage.add_log(f"❌ {symbol}: Backfill failed - no data found", symbol=symbol, kind=KIND_STOCK)
+            # Only remove if it's a NEW symbol (not existing)
+            remove_new_symbol(symbol, is_existing)
+            return
+
+        # Recompute only what backfills touched (cached otherwise), then validate
+        loader.refresh()
+        metrics = loader.metrics.get(symbol)
+
+        if not metrics:
+            storage.add_log(f"⚠️ {symbol}: No historical data found after backfill", symbol=symbol, kind=KIND_STOCK)
+            # Only remove if it's a NEW symbol
+            remove_new_symbol(symbol, is_existing)
+            return
+
+        # Recency check - ONLY for new symbols
+        if not is_existing:
+            max_market_date = loader.last_market_date
+            if max_market_date:
+                symbol_last_date = metrics.get("last_date")
+
+                if symbol_last_date:
+                    d1 = datetime.strptime(max_market_date, "%Y-%m-%d")
+                    d2 = datetime.strptime(symbol_last_date, "%Y-%m-%d")
+
+                    if (d1 - d2).days > 7:
+                        storage.add_log(f"⚠️ {symbol}: Appears inactive (last trade: {symbol_last_date})", symbol=symbol, kind=KIND_STOCK)
+                        token_removed = storage.remove_stock(symbol)
+                        if token_removed:
+                            ws.remove_subscription(token_removed)
+                        return
+
+        # Success - update metrics
+        storage.set_historical_metrics(symbol, metrics)
+        storage.add_log(f"✅ {symbol}: Historical data loaded ({days} days)", symbol=symbol, kind=KIND_STOCK)
+        print(f"✅ Background backfill completed for {symbol}")
+
+    except Exception as e:
+        storage.add_log(f"❌ {symbol}: Backfill failed - {str(e)}", symbol=symbol, kind=KIND_STOCK)
+        print(f"Error in background backfill for {symbol}: {e}")
+        # Only remove NEW symbols on critical failure
+        if not is_existing:
+            try:
+                token_removed = storage.remove_stock(symbol)
+                if token_removed:
+                    ws.remove_subscription(token_removed)
+            except Exception as cleanup_error:
+                print(f"Error cleaning up {symbol}: {cleanup_error}")
+
 @app.route("/add-stock", methods=["POST"])
 def add_stock():
     try:
         data = request.json
         symbol = data.get("symbol", "").strip().upper()
-        days = data.get("days", 30)  # Default to 30 days if not specified
-        
         if not symbol:
             return jsonify({"status": "error", "message": "Symbol is required"}), 400
+
+        # Default to 30 days if not specified; anything else must be a positive int
+        try:
+            days = int(data.get("days", 30))
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "days must be an integer"}), 400
+        if days < 1:
+            return jsonify({"status": "error", "message": "days must be at least 1"}), 400
         
         # Get token details
         token_info = token_lookup.get_token_details(symbol)
@@ -213,93 +456,178 @@ def add_stock():
 
         # Check if already monitoring - if so, just extend the historical data
         is_existing = symbol in storage.symbols.values()
+
+        # Reject symbols with no recent EQ trades up front when the local
+        # EQ partitions are current (no download needed to find out)
+        if not is_existing and ingest_bhavcopy.recently_traded(symbol) is False:
+            return jsonify({
+                "status": "error",
+                "message": f"{symbol} has no EQ trades in recent sessions."
+            }), 400
         
         if is_existing:
-            storage.add_log(f"📊 {symbol}: Extending historical data to {days} days")
+            storage.add_log(f"📊 {symbol}: Extending historical data to {days} days", symbol=symbol, kind=KIND_STOCK)
         else:
             # 2. Immediately register in Storage & WebSocket for new symbols
             # This allows the stock to appear in the UI right away
             storage.register_stock(symbol=symbol, token=token)
             ws.add_subscription(symbol=symbol, token=token, exchange=exchange)
-            storage.add_log(f"STOCK ADDED: {symbol} (backfilling {days} days in background)")
+            storage.add_log(f"STOCK ADDED: {symbol} (backfilling {days} days in background)", symbol=symbol, kind=KIND_STOCK)
         
         
-        # 3. Launch background thread for backfill and validation
-        def background_backfill():
-            try:
-                print(f"🚀 Background backfill started for {symbol} ({days} days)")
-                success = backfill_symbol(symbol, days=days)
-                
-                if not success:
-                    storage.add_log(f"❌ {symbol}: Backfill failed - no data found")
-                    # Only remove if it's a NEW symbol (not existing)
-                    if not is_existing:
-                        token_removed = storage.remove_stock(symbol)
-                        if token_removed:
-                            ws.remove_subscription(token_removed)
-                    return
-                
-                # Reload and validate
-                new_hist = loader.load()
-                metrics = new_hist.get(symbol)
-                
-                if not metrics:
-                    storage.add_log(f"⚠️ {symbol}: No historical data found after backfill")
-                    # Only remove if it's a NEW symbol
-                    if not is_existing:
-                        token_removed = storage.remove_stock(symbol)
-                        if token_removed:
-                            ws.remove_subscription(token_removed)
-                    return
-                
-                # Recency check - ONLY for new symbols
-                if not is_existing:
-                    all_dates = [m.get("last_date") for m in new_hist.values() if m.get("last_date")]
-                    if all_dates:
-                        max_market_date = max(all_dates)
-                        symbol_last_date = metrics.get("last_date")
-                        
-                        if symbol_last_date:
-                            d1 = datetime.strptime(max_market_date, "%Y-%m-%d")
-                            d2 = datetime.strptime(symbol_last_date, "%Y-%m-%d")
-                            
-                            if (d1 - d2).days > 7:
-                                storage.add_log(f"⚠️ {symbol}: Appears inactive (last trade: {symbol_last_date})")
-                                token_removed = storage.remove_stock(symbol)
-                                if token_removed:
-                                    ws.remove_subscription(token_removed)
-                                return
-                
-                # Success - update metrics
-                storage.set_historical_metrics(symbol, metrics)
-                storage.add_log(f"✅ {symbol}: Historical data loaded ({days} days)")
-                print(f"✅ Background backfill completed for {symbol}")
-                
-            except Exception as e:
-                storage.add_log(f"❌ {symbol}: Backfill failed - {str(e)}")
-                print(f"Error in background backfill for {symbol}: {e}")
-                # Only remove NEW symbols on critical failure
-                if not is_existing:
-                    try:
-                        token_removed = storage.remove_stock(symbol)
-                        if token_removed:
-                            ws.remove_subscription(token_removed)
-                    except Exception as cleanup_error:
-                        print(f"Error cleaning up {symbol}: {cleanup_error}")
-        
-        # Start background thread
-        threading.Thread(target=background_backfill, daemon=True).start()
+        # 3. Queue the backfill; the shared scheduler merges it with other pending symbols
+        job_id = backfill_scheduler.submit(
+            [symbol], days=days,
+            on_done=lambda job: finish_backfill(symbol, days, is_existing, job["results"].get(symbol, False))
+        )
         
         return jsonify({
             "status": "ok", 
             "message": f"Added {symbol}. Fetching {days} days of history in background...",
-            "token_info": token_info
+            "token_info": token_info,
+            "job_id": job_id
         })
 
     except Exception as e:
         print(f"Error adding stock: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# ---------------- WATCHLIST ----------------
+
+MAX_IMPORT_SYMBOLS = 1000
+
+def _parse_watchlist(req):
+    """
+    Symbols and days from a bulk import request:
+    JSON {"symbols": [...], "days": N} / a JSON list, or a CSV (body or
+    uploaded "file") with a "symbol" column or one symbol per line.
+    """
+    days = req.args.get("days", 30, type=int)
+
+    if req.is_json:
+        data = req.get_json(silent=True)
+        if isinstance(data, dict):
+            days = int(data.get("days", days))
+            data = data.get("symbols", [])
+        items = data if isinstance(data, list) else []
+        symbols = [i.get("symbol", "") if isinstance(i, dict) else str(i) for i in items]
+    else:
+        upload = req.files.get("file")
+        text = upload.read().decode("utf-8-sig") if upload else req.get_data(as_text=True)
+        rows = [r for r in csv.reader(io.StringIO(text)) if r and r[0].strip()]
+        header = [c.strip().lower() for c in rows[0]] if rows else []
+        col = header.index("symbol") if "symbol" in header else None
+        if col is not None:
+            rows = rows[1:]
+        symbols = [r[col or 0] for r in rows if len(r) > (col or 0)]
+
+    symbols = [s.strip().upper() for s in symbols if s and s.strip()]
+    return list(dict.fromkeys(symbols)), days
+
+@app.route("/watchlist/import", methods=["POST"])
+def import_watchlist():
+    """
+    Bulk add: resolve every token in one pass, register all new stocks under
+    one lock, subscribe in batched feed requests and queue one backfill job.
+    """
+    try:
+        symbols, days = _parse_watchlist(request)
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Could not parse watchlist: {e}"}), 400
+
+    if not symbols:
+        return jsonify({"status": "error", "message": "No symbols provided"}), 400
+    if days < 1:
+        return jsonify({"status": "error", "message": "days must be at least 1"}), 400
+    if len(symbols) > MAX_IMPORT_SYMBOLS:
+        return jsonify({"status": "error", "message": f"At most {MAX_IMPORT_SYMBOLS} symbols per import"}), 400
+
+    resolved = token_lookup.resolve_many(symbols)
+    monitored = set(storage.symbols.values())
+
+    results = {}
+    new_stocks = []
+    for symbol in symbols:
+        info = resolved.get(symbol)
+        if not info:
+            results[symbol] = {"symbol": symbol, "status": "not_found"}
+        elif symbol in monitored:
+            results[symbol] = {"symbol": symbol, "status": "existing", "token": info["token"]}
+        elif ingest_bhavcopy.recently_traded(symbol) is False:
+            results[symbol] = {"symbol": symbol, "status": "inactive", "token": info["token"]}
+        else:
+            results[symbol] = {"symbol": symbol, "status": "added", "token": info["token"]}
+            new_stocks.append({"symbol": symbol, "token": info["token"], "exchange": "NSECM"})
+
+    storage.register_stocks(new_stocks)
+    ws.add_subscriptions(new_stocks)
+
+    backfill = [s for s, r in results.items() if r["status"] in ("added", "existing")]
+    job_id = None
+    if backfill:
+        new_symbols = {s["symbol"] for s in new_stocks}
+
+        def on_done(job):
+            for symbol in job["symbols"]:
+                finish_backfill(symbol, days, symbol not in new_symbols, job["results"].get(symbol, False))
+
+        job_id = backfill_scheduler.submit(backfill, days=days, on_done=on_done)
+        storage.add_log(f"WATCHLIST IMPORT: {len(new_stocks)} added, backfilling {len(backfill)} symbols ({days} days)", kind=KIND_STOCK)
+
+    summary = {}
+    for r in results.values():
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+
+    return jsonify({
+        "status": "ok",
+        "job_id": job_id,
+        "summary": summary,
+        "results": list(results.values())
+    })
+
+@app.route("/watchlist/export")
+def export_watchlist():
+    """Current watchlist as CSV (default) or JSON (?format=json)."""
+    # One entry per symbol, with the token its row is tracked under
+    with storage.lock:
+        stocks = sorted(
+            ({"symbol": symbol, "token": row.get("token"), "exchange": "NSECM"}
+             for symbol, row in storage.symbol_data.items()),
+            key=lambda s: s["symbol"]
+        )
+
+    if request.args.get("format") == "json":
+        return jsonify(stocks)
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["symbol", "token", "exchange"])
+    writer.writeheader()
+    writer.writerows(stocks)
+    return Response(out.getvalue(), mimetype="text/csv",
+                    headers={"Content-Disposition": "attachment; filename=watchlist.csv"})
+
+@app.route("/backfill-jobs")
+def backfill_jobs():
+    """Recent backfill jobs, newest first, with per-symbol progress."""
+    return jsonify(backfill_scheduler.list_jobs())
+
+@app.route("/backfill-jobs/<int:job_id>")
+def backfill_job(job_id):
+    job = backfill_scheduler.job(job_id)
+    if not job:
+        return jsonify({"status": "error", "message": f"Unknown job {job_id}"}), 404
+    return jsonify(job)
+
+@app.route("/startup-report")
+def startup_report():
+    """Per-phase startup timings (cold or warm start)."""
+    return jsonify(timer.report())
+
+@app.route("/ingest-stats")
+def ingest_stats():
+    """Tick pipeline health: queue depth and recent micro-batch sizes."""
+    return jsonify({**handler.stats(), "response_cache": response_cache.stats()})
+
 @app.route("/verify-window")
 def verify_window():
     import datetime
@@ -309,19 +637,25 @@ def verify_window():
         "window_start": str(storage.window_start_time),
         "window_end": str(storage.window_end_time),
         "in_window": storage.in_selected_time_window(),
-        "sample_stock": list(storage.symbol_data.items())[0] if storage.symbol_data else "NO DATA"
+        "sample_stock": storage.snapshot.rows[0] if storage.snapshot.rows else "NO DATA"
     })
 
 def start_ws():
     # 🔥 Restore daily catch-up (last 15 days) but keep 1-year backfill removed
     try:
         run_auto_ingest()
+        if loader.store.changed_since(loader.revision):
+            save_warm_snapshot()
     except Exception as e:
         print(f"⚠️ Background auto-ingest failed: {e}")
     
     ws.connect_ws()
 
 if __name__ == "__main__":
+    handler.start()
+    storage.start_snapshot_publisher()
+    timer.print_report()
+    deferred.run(timer)
     threading.Thread(target=start_ws, daemon=True).start()
     port = int(os.environ.get("PORT", 7000))
     app.run(debug=False, host="0.0.0.0", port=port)
\ No newline at end of file
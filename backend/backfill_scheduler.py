@@ -0,0 +1,208 @@
+import itertools
+import threading
+import time
+import traceback
+from datetime import date
+
+import scripts.ingest_bhavcopy as ingest_bhavcopy
+
+MAX_SEARCH_DAYS = 730   # Cap at 2 years, same as backfill_symbol
+MAX_JOBS_KEPT = 200     # finished jobs remembered for the progress endpoint
+
+
+class BackfillScheduler:
+    """
+    One worker thread serving every backfill request.
+    Pending jobs are merged: all waiting symbols walk the trading days
+    together, so each date is read (partition/cache/network) once for all of
+    them, and the worker is the only backfill writer to the history store.
+    """
+
+    def __init__(self, on_idle=None):
+        self.on_idle = on_idle  # called after a walk finishes all its jobs
+        self.jobs = {}          # job id -> job dict
+        self.pending = []       # job ids not yet picked up
+        self.active = []        # job ids in the current walk
+        self.cond = threading.Condition()
+        self.ids = itertools.count(1)
+        self.thread = None
+
+    # ---------------- API ----------------
+
+    def submit(self, symbols, days=30, on_done=None):
+        """
+        Queue a backfill of `days` trading days for `symbols`.
+        on_done(job) runs on the worker thread once every symbol is finished.
+        Raises ValueError for a bad `days`, before it can reach a shared walk.
+        """
+        if isinstance(days, bool) or not isinstance(days, int) or days < 1:
+            raise ValueError(f"days must be a positive integer, got {days!r}")
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+        with self.cond:
+            job_id = next(self.ids)
+            self.jobs[job_id] = {
+                "id": job_id,
+                "symbols": symbols,
+                "days": days,
+                "status": "queued",
+                "progress": {s: 0 for s in symbols},
+                "results": {},
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "error": None,
+                "on_done": on_done,
+            }
+            self.pending.append(job_id)
+            self._trim()
+            self.cond.notify()
+        self.start()
+        return job_id
+
+    def job(self, job_id):
+        with self.cond:
+            job = self.jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def list_jobs(self):
+        with self.cond:
+            return [self._public(j) for j in reversed(list(self.jobs.values()))]
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    # ---------------- WORKER ----------------
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+            try:
+                self._walk()
+            except Exception as e:
+                traceback.print_exc()
+                self._fail_active(str(e))
+
+    def _take_pending(self):
+        """Move queued jobs into the active walk. True if any were added."""
+        with self.cond:
+            if not self.pending:
+                return False
+            for job_id in self.pending:
+                job = self.jobs[job_id]
+                job["status"] = "running"
+                job["started"] = time.time()
+                self.active.append(job_id)
+            self.pending = []
+            return True
+
+    def _targets(self):
+        """symbol -> trading days wanted, merged across active jobs (largest wins)."""
+        targets = {}
+        with self.cond:
+            for job_id in self.active:
+                job = self.jobs[job_id]
+                for s in job["symbols"]:
+                    targets[s] = max(targets.get(s, 0), job["days"])
+        return targets
+
+    def _walk(self):
+        store = ingest_bhavcopy.get_store()
+        self._take_pending()
+
+        while self.active:
+            targets = self._targets()
+            print(f"🚀 Backfill: {len(targets)} symbols across {len(self.active)} jobs")
+            window = max(ingest_bhavcopy.get_downloader().workers * 2, 8)
+
+            restarted = False
+            for dates in ingest_bhavcopy.date_windows(date.today(), MAX_SEARCH_DAYS, window):
+                undone = {s for s, days in targets.items() if store.count(s) < days}
+                if not undone:
+                    break
+
+                # One read per date for every symbol still short of its target
+                ingest_bhavcopy.ingest_dates(dates, store, allowed_symbols=undone)
+                self._update_progress(store)
+
+                # Symbols submitted meanwhile join the walk; dates already covered
+                # are skipped cheaply (store keys, then partitions/zip cache)
+                if self._take_pending():
+                    restarted = True
+                    break
+
+            if not restarted:
+                self._finish_active(store)
+
+        if self.on_idle:
+            self.on_idle()
+
+    def _update_progress(self, store):
+        finished = []
+        with self.cond:
+            for job_id in self.active:
+                job = self.jobs[job_id]
+                for s in job["symbols"]:
+                    job["progress"][s] = store.count(s)
+                if all(job["progress"][s] >= job["days"] for s in job["symbols"]):
+                    finished.append(job_id)
+        for job_id in finished:
+            self._complete(job_id, store)
+
+    def _finish_active(self, store):
+        for job_id in list(self.active):
+            self._complete(job_id, store)
+
+    def _complete(self, job_id, store):
+        with self.cond:
+            if job_id not in self.active:
+                return
+            self.active.remove(job_id)
+            job = self.jobs[job_id]
+            for s in job["symbols"]:
+                job["progress"][s] = store.count(s)
+                job["results"][s] = job["progress"][s] > 0
+            on_done = job["on_done"]
+
+        try:
+            if on_done:
+                on_done(self._public(job))
+            job["status"] = "done"
+        except Exception as e:
+            traceback.print_exc()
+            job["status"] = "failed"
+            job["error"] = str(e)
+        job["finished"] = time.time()
+        print(f"✅ Backfill job {job_id} finished: {job['results']}")
+
+    def _fail_active(self, error):
+        with self.cond:
+            failed = [self.jobs[j] for j in self.active]
+            self.active = []
+        for job in failed:
+            job["results"] = {s: False for s in job["symbols"]}
+            job["status"] = "failed"
+            job["error"] = error
+            job["finished"] = time.time()
+            if job["on_done"]:
+                try:
+                    job["on_done"](self._public(job))
+                except Exception:
+                    traceback.print_exc()
+
+    # ---------------- HELPERS ----------------
+
+    def _trim(self):
+        done = [j for j, job in self.jobs.items() if job["finished"]]
+        for job_id in done[:max(0, len(self.jobs) - MAX_JOBS_KEPT)]:
+            del self.jobs[job_id]
+
+    @staticmethod
+    def _public(job):
+        out = {k: v for k, v in job.items() if k != "on_done"}
+        out["progress"] = dict(job["progress"])
+        out["results"] = dict(job["results"])
+        return out
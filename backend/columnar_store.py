@@ -0,0 +1,254 @@
+import numpy as np
+from collections.abc import MutableMapping
+
+# Numeric / flag fields live in dense NumPy columns indexed by a symbol id.
+# None is stored as NaN (float), 0 (int) or False (flag).
+INT_COLUMNS = ("live_volume", "window_volume", "prev_day", "window_p90", "available_days")
+FLOAT_COLUMNS = ("window_zscore", "window_mean", "window_std", "weekly_avg", "monthly_avg", "last_update")
+FLAG_COLUMNS = ("user_alert_hit", "window_alert_hit", "is_red_alert", "is_stale")
+
+# Low-cardinality string fields are dictionary encoded (code -1 == None)
+CATEGORY_COLUMNS = ("volume_intensity", "status", "last_status")
+
+_DTYPES = {}
+_DTYPES.update({c: np.int64 for c in INT_COLUMNS})
+_DTYPES.update({c: np.float64 for c in FLOAT_COLUMNS})
+_DTYPES.update({c: np.bool_ for c in FLAG_COLUMNS})
+_DTYPES.update({c: np.int16 for c in CATEGORY_COLUMNS})
+
+_EMPTY = {c: 0 for c in INT_COLUMNS}
+_EMPTY.update({c: np.nan for c in FLOAT_COLUMNS})
+_EMPTY.update({c: False for c in FLAG_COLUMNS})
+_EMPTY.update({c: -1 for c in CATEGORY_COLUMNS})
+
+
+class RowView(MutableMapping):
+    """
+    Dict-compatible view over one row of a ColumnarStore.
+    Existing callers keep using row["live_volume"], row.get(...), row.update(...).
+    Like a dict, a column only exists for the row once it has been assigned.
+    """
+    __slots__ = ("_store", "_id")
+
+    def __init__(self, store, row_id):
+        self._store = store
+        self._id = row_id
+
+    def __getitem__(self, key):
+        return self._store.get_value(self._id, key)
+
+    def __setitem__(self, key, value):
+        self._store.set_value(self._id, key, value)
+
+    def __delitem__(self, key):
+        self._store.del_value(self._id, key)
+
+    def __iter__(self):
+        yield "symbol"
+        yield from self._store.assigned_columns(self._id)
+        yield from self._store.extras[self._id]
+
+    def __len__(self):
+        return 1 + len(self._store.assigned_columns(self._id)) + len(self._store.extras[self._id])
+
+    def __repr__(self):
+        return f"RowView({dict(self)!r})"
+
+
+class ColumnarStore(MutableMapping):
+    """
+    Array-backed replacement for Storage.symbol_data.
+    Maps symbol -> RowView; the data itself lives in one NumPy array per field,
+    so the full NSECM EQ universe costs a few hundred bytes per symbol.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.ids = {}              # symbol -> row id (insertion ordered)
+        self.symbols_by_id = []    # row id -> symbol (None when freed)
+        self.free_ids = []
+        self.extras = []           # row id -> dict of non-columnar fields
+        self.views = []
+        self.columns = {name: np.full(capacity, _EMPTY[name], dtype=dtype)
+                        for name, dtype in _DTYPES.items()}
+        # name -> per-row "has been set" flags, so rows expose the same keys a dict would
+        self.assigned = {name: np.zeros(capacity, dtype=np.bool_) for name in _DTYPES}
+        self.vocab = {name: [] for name in CATEGORY_COLUMNS}
+        self.vocab_index = {name: {} for name in CATEGORY_COLUMNS}
+
+    # ---------------- ALLOCATION ----------------
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        for name, arr in self.columns.items():
+            grown = np.full(new_capacity, _EMPTY[name], dtype=arr.dtype)
+            grown[:self.capacity] = arr
+            self.columns[name] = grown
+        for name, arr in self.assigned.items():
+            grown = np.zeros(new_capacity, dtype=np.bool_)
+            grown[:self.capacity] = arr
+            self.assigned[name] = grown
+        self.capacity = new_capacity
+
+    def _alloc(self, symbol):
+        if self.free_ids:
+            row_id = self.free_ids.pop()
+            self.symbols_by_id[row_id] = symbol
+            self.extras[row_id] = {}
+        else:
+            row_id = len(self.symbols_by_id)
+            if row_id >= self.capacity:
+                self._grow()
+            self.symbols_by_id.append(symbol)
+            self.extras.append({})
+            self.views.append(RowView(self, row_id))
+        self.ids[symbol] = row_id
+        return row_id
+
+    def _free(self, row_id):
+        for name, arr in self.columns.items():
+            arr[row_id] = _EMPTY[name]
+            self.assigned[name][row_id] = False
+        self.symbols_by_id[row_id] = None
+        self.extras[row_id] = {}
+        self.free_ids.append(row_id)
+
+    def row_id(self, symbol):
+        return self.ids.get(symbol)
+
+    # ---------------- CELL ACCESS ----------------
+
+    def category_code(self, name, value):
+        """Dictionary code of `value` in category column `name` (for vectorized writes)."""
+        if value is None:
+            return -1
+        index = self.vocab_index[name]
+        code = index.get(value)
+        if code is None:
+            code = len(self.vocab[name])
+            self.vocab[name].append(value)
+            index[value] = code
+        return code
+
+    def assigned_columns(self, row_id):
+        return [name for name, flags in self.assigned.items() if flags[row_id]]
+
+    def get_value(self, row_id, key):
+        if key == "symbol":
+            return self.symbols_by_id[row_id]
+        arr = self.columns.get(key)
+        if arr is None:
+            return self.extras[row_id][key]
+        if not self.assigned[key][row_id]:
+            raise KeyError(key)
+        value = arr[row_id]
+        if key in CATEGORY_COLUMNS:
+            return None if value < 0 else self.vocab[key][value]
+        if arr.dtype == np.float64:
+            return None if value != value else float(value)
+        if arr.dtype == np.bool_:
+            return bool(value)
+        return int(value)
+
+    def set_value(self, row_id, key, value):
+        if key == "symbol":
+            return
+        arr = self.columns.get(key)
+        if arr is None:
+            self.extras[row_id][key] = value
+            return
+        if key in CATEGORY_COLUMNS:
+            arr[row_id] = self.category_code(key, value)
+        else:
+            arr[row_id] = _EMPTY[key] if value is None else value
+        self.assigned[key][row_id] = True
+
+    def del_value(self, row_id, key):
+        if key in self.columns:
+            if not self.assigned[key][row_id]:
+                raise KeyError(key)
+            self.columns[key][row_id] = _EMPTY[key]
+            self.assigned[key][row_id] = False
+        else:
+            del self.extras[row_id][key]
+
+    # ---------------- MAPPING ----------------
+
+    def __getitem__(self, symbol):
+        return self.views[self.ids[symbol]]
+
+    def __setitem__(self, symbol, row):
+        row_id = self.ids.get(symbol)
+        if row_id is None:
+            row_id = self._alloc(symbol)
+        view = self.views[row_id]
+        view.update(row)
+
+    def __delitem__(self, symbol):
+        row_id = self.ids.pop(symbol)
+        self._free(row_id)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, symbol):
+        return symbol in self.ids
+
+    def setdefault(self, symbol, default=None):
+        if symbol not in self.ids:
+            self[symbol] = default or {}
+        return self[symbol]
+
+    # ---------------- BULK READS ----------------
+
+    def active_ids(self):
+        return np.fromiter(self.ids.values(), dtype=np.intp, count=len(self.ids))
+
+    def column(self, name, ids=None):
+        """Raw column slice for vectorized callers (no Python conversion)."""
+        if ids is None:
+            ids = self.active_ids()
+        return self.columns[name][ids]
+
+    def assign(self, name, ids, values):
+        """Vectorized write of `values` into column `name` for rows `ids` (marks them set)."""
+        self.columns[name][ids] = values
+        self.assigned[name][ids] = True
+
+    def records(self):
+        """
+        All rows as plain dicts, converted column-at-a-time with tolist()
+        instead of one NumPy scalar per cell.
+        """
+        ids = self.active_ids()
+        converted = {}
+        present = {}
+        for name, arr in self.columns.items():
+            flags = self.assigned[name][ids]
+            if not flags.any():
+                continue
+            present[name] = flags.tolist()
+            values = arr[ids]
+            if name in CATEGORY_COLUMNS:
+                vocab = self.vocab[name]
+                converted[name] = [vocab[c] if c >= 0 else None for c in values.tolist()]
+            elif values.dtype == np.float64:
+                obj = values.astype(object)
+                obj[np.isnan(values)] = None
+                converted[name] = obj.tolist()
+            else:
+                converted[name] = values.tolist()
+
+        names = list(converted)
+        out = []
+        for pos, (symbol, row_id) in enumerate(self.ids.items()):
+            rec = {"symbol": symbol}
+            for name in names:
+                if present[name][pos]:
+                    rec[name] = converted[name][pos]
+            rec.update(self.extras[row_id])
+            out.append(rec)
+        return out
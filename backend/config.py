@@ -6,7 +6,12 @@ LOGIN_ID = "hetvol"
 PASSWORD = "hetvol"
 
 HEARTBEAT_INTERVAL = 60  # Heartbeat interval in seconds
-NIFTY50_STOCKS = []
+
+# Keep live per-symbol state in NumPy columns (falls back to dicts without NumPy)
+COLUMNAR_STATE = os.environ.get("VOLALERT_COLUMNAR", "1") == "1"
+
+# Start from the warm-start snapshot when it is still valid (see warm_start.py)
+WARM_START = os.environ.get("VOLALERT_WARM_START", "1") == "1"
 
 
 out_file = os.path.join(os.path.dirname(__file__), "data", "contracts_nsefo.json")
@@ -40,13 +45,34 @@ NIFTY_50_SYMBOLS = {
     "TRENT", "BEL", "TATACHEM" 
 }
 
-with open(out_file, 'rb') as f:
-    data = json.load(f)
+_nifty50_stocks = None
+
+def load_nifty50_stocks():
+    """
+    NIFTY 50 contracts from contracts_nsefo.json, parsed on first use
+    (importing config for the feed settings no longer reads the file).
+    """
+    global _nifty50_stocks
+    if _nifty50_stocks is not None:
+        return _nifty50_stocks
+
+    with open(out_file, 'rb') as f:
+        data = json.load(f)
+
+    stocks = []
+    for contract in data:
+        symbol = contract['s'].strip().upper()
+
+        # Strict filter: Only allow actual NIFTY 50 symbols
+        if symbol in NIFTY_50_SYMBOLS:
+            token = contract['t']
+            stocks.append({"symbol": symbol, "token": token, "exchange": "NSECM"})
+
+    _nifty50_stocks = stocks
+    return stocks
 
-for contract in data:
-    symbol = contract['s'].strip().upper()
-    
-    # Strict filter: Only allow actual NIFTY 50 symbols
-    if symbol in NIFTY_50_SYMBOLS:
-        token = contract['t']
-        NIFTY50_STOCKS.append({"symbol": symbol, "token": token, "exchange": "NSECM"})
+def __getattr__(name):
+    # `from config import NIFTY50_STOCKS` keeps working, it just parses lazily
+    if name == "NIFTY50_STOCKS":
+        return load_nifty50_stocks()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
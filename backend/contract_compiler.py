@@ -0,0 +1,336 @@
+import hashlib
+import heapq
+import json
+import os
+import pyexpat
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+FORMAT_VERSION = 1
+
+# XML child tag -> compact key; everything else in a record is skipped
+FIELDS = {
+    "TokenNo": "t",
+    "Symbol": "s",
+    "Series": "p",
+    "SymbolDesc": "n",
+    "SymbolDescription": "n",
+    "ExpiryDate": "e",
+    "StrikePrice": "st",
+}
+COLUMNS = ("t", "s", "p", "n", "e", "st")
+
+READ_CHUNK = 1 << 20
+PROGRESS_EVERY = 100000
+RUN_ROWS = 200000       # rows held in memory per sorted run before spilling to disk
+
+
+def master_path_for(exchange):
+    """One master per exchange, so compiling NSECM never replaces BSEFO's."""
+    return os.path.join(DATA_DIR, f"contracts_master.{exchange}.jsonl")
+
+
+def index_path(master_path):
+    return master_path.rsplit(".", 1)[0] + ".index.json"
+
+
+def diff_path(master_path):
+    return master_path.rsplit(".", 1)[0] + ".diff.json"
+
+
+# ---------------- STREAMING PARSE ----------------
+
+def iter_contracts(xml_path, tag_suffix):
+    """
+    Yield one (t, s, p, n, e, st) tuple per contract element, in file order.
+    Uses expat callbacks directly: no element tree is built and only the wanted
+    fields of the current record are kept. Repeated strings (symbol, name,
+    series) are shared, so the only state that grows is one copy of each
+    distinct string.
+    """
+    slot = {key: COLUMNS.index(key) for key in FIELDS.values()}
+    shared = {}
+    parsed = []
+    state = {"row": None, "col": None, "text": []}
+
+    def start(name, attrs):
+        local = name.rpartition("}")[2]
+        if state["row"] is None:
+            if local.endswith(tag_suffix):
+                state["row"] = [""] * len(COLUMNS)
+            return
+        key = FIELDS.get(local)
+        if key:
+            state["col"] = slot[key]
+            state["text"] = []
+
+    def text(data):
+        if state["col"] is not None:
+            state["text"].append(data)
+
+    def end(name):
+        row = state["row"]
+        if row is None:
+            return
+        col = state["col"]
+        if col is not None:
+            value = "".join(state["text"]).strip()
+            row[col] = value if col == 0 else shared.setdefault(value, value)
+            state["col"] = None
+        elif name.rpartition("}")[2].endswith(tag_suffix):
+            state["row"] = None
+            if row[0]:
+                parsed.append(tuple(row))
+
+    parser = pyexpat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+
+    count = 0
+    with open(xml_path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            parser.Parse(chunk, not chunk)
+            before = count
+            count += len(parsed)
+            yield from parsed
+            parsed.clear()
+            if count // PROGRESS_EVERY > before // PROGRESS_EVERY:
+                print(f"Parsed {count} records from {tag_suffix}...")
+            if not chunk:
+                break
+
+
+# ---------------- SOURCE FINGERPRINT ----------------
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_unchanged(xml_path, header):
+    """mtime+size match is trusted; otherwise compare content hashes."""
+    saved = (header or {}).get("source")
+    if not saved:
+        return False
+    st = os.stat(xml_path)
+    if st.st_size != saved["size"]:
+        return False
+    return st.st_mtime_ns == saved["mtime_ns"] or _sha256(xml_path) == saved["sha256"]
+
+
+# ---------------- EXTERNAL SORT ----------------
+
+def _token_key(token):
+    # Numeric tokens sort numerically; anything else after them, as text
+    return (0, int(token), "") if token.isdigit() else (1, 0, token)
+
+
+def _row_key(row):
+    return _token_key(row[0])
+
+
+def _iter_run(path):
+    with open(path, "r") as f:
+        for line in f:
+            yield tuple(json.loads(line))
+
+
+def spill_sorted_runs(rows, run_dir, run_rows=RUN_ROWS):
+    """
+    Sort `rows` by token in runs of at most `run_rows`, each written to its
+    own file under run_dir. Returns (run paths, total row count).
+    """
+    paths = []
+    count = 0
+    buf = []
+
+    def flush():
+        buf.sort(key=_row_key)
+        path = os.path.join(run_dir, f"run{len(paths):04d}.jsonl")
+        with open(path, "w") as f:
+            for row in buf:
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+        paths.append(path)
+        buf.clear()
+
+    for row in rows:
+        buf.append(row)
+        count += 1
+        if len(buf) >= run_rows:
+            flush()
+    if buf:
+        flush()
+    return paths, count
+
+
+def merge_runs(paths):
+    """Token-ordered stream over sorted run files (one open file per run)."""
+    return heapq.merge(*(_iter_run(p) for p in paths), key=_row_key)
+
+
+# ---------------- COMPACT INDEXED OUTPUT ----------------
+
+def read_header(master_path):
+    try:
+        with open(master_path, "r") as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return header if header.get("version") == FORMAT_VERSION else None
+
+
+def iter_master(master_path):
+    """Stream (t, s, p, n, e, st) rows of a compiled master, token order."""
+    with open(master_path, "r") as f:
+        f.readline()
+        for line in f:
+            yield tuple(json.loads(line))
+
+
+def write_master(rows, header, master_path):
+    """
+    JSON Lines: a header line, then one compact row per line sorted by token.
+    The sidecar index maps symbol -> byte offsets of its rows for direct seeks;
+    offsets are kept as int64 arrays (8 bytes per row) and the index is
+    written out symbol by symbol.
+    """
+    index = {}
+    os.makedirs(os.path.dirname(master_path), exist_ok=True)
+    tmp = master_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(json.dumps(header, separators=(",", ":")).encode() + b"\n")
+        for row in rows:
+            offsets = index.get(row[1])
+            if offsets is None:
+                offsets = index[row[1]] = array("q")
+            offsets.append(f.tell())
+            f.write(json.dumps(row, separators=(",", ":")).encode() + b"\n")
+
+    idx_tmp = index_path(master_path) + ".tmp"
+    with open(idx_tmp, "w") as f:
+        f.write("{")
+        for i, (symbol, offsets) in enumerate(index.items()):
+            f.write(("," if i else "") + json.dumps(symbol) + ":[" + ",".join(map(str, offsets)) + "]")
+        f.write("}")
+    os.replace(tmp, master_path)
+    os.replace(idx_tmp, index_path(master_path))
+
+
+def lookup(symbols, exchange=None, master_path=None):
+    """{symbol: [row dicts]} read by seeking to indexed offsets (no full scan)."""
+    master_path = master_path or master_path_for(exchange)
+    with open(index_path(master_path), "r") as f:
+        index = json.load(f)
+    out = {}
+    with open(master_path, "rb") as f:
+        for s in symbols:
+            rows = []
+            for offset in index.get(s, []):
+                f.seek(offset)
+                rows.append(dict(zip(COLUMNS, json.loads(f.readline()))))
+            out[s] = rows
+    return out
+
+
+# ---------------- DIFF ----------------
+
+def diff_sorted(old_rows, new_rows):
+    """
+    Merge-walk two token-sorted row streams.
+    Returns new, removed and renamed (same token, different symbol/name/series).
+    """
+    added, removed, renamed = [], [], []
+    old_iter, new_iter = iter(old_rows), iter(new_rows)
+    old, new = next(old_iter, None), next(new_iter, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and _token_key(old[0]) < _token_key(new[0])):
+            removed.append(dict(zip(COLUMNS, old)))
+            old = next(old_iter, None)
+        elif old is None or _token_key(new[0]) < _token_key(old[0]):
+            added.append(dict(zip(COLUMNS, new)))
+            new = next(new_iter, None)
+        else:
+            if old[1:4] != new[1:4]:
+                renamed.append({"t": new[0],
+                                "from": dict(zip(COLUMNS[1:4], old[1:4])),
+                                "to": dict(zip(COLUMNS[1:4], new[1:4]))})
+            old, new = next(old_iter, None), next(new_iter, None)
+
+    return {"new": added, "removed": removed, "renamed": renamed}
+
+
+# ---------------- COMPILE ----------------
+
+def compile_master(xml_path, tag_suffix, exchange=None, master_path=None):
+    """
+    Compile a contract XML (NSECM.xml / NSEFO.xml) into the exchange's master.
+    Later runs also write the diff against the previous master (new, removed,
+    renamed tokens); an unchanged XML is not parsed at all and yields an empty
+    diff. Returns the diff, or None on the first run (nothing to diff against).
+
+    Rows are sorted externally: sorted runs of RUN_ROWS are spilled to a temp
+    dir next to the master and merged back with heapq.merge, once for the diff
+    and once for the write. Peak memory is one run plus the offset index and
+    the diff itself, not the whole master.
+    """
+    exchange = exchange or tag_suffix
+    master_path = master_path or master_path_for(exchange)
+    t0 = time.time()
+    previous = read_header(master_path)
+
+    if previous and previous.get("exchange") == exchange and source_unchanged(xml_path, previous):
+        print(f"✅ {os.path.basename(xml_path)} unchanged since {previous.get('compiled')}, nothing to do")
+        return {"new": [], "removed": [], "renamed": [],
+                "previous": previous.get("compiled"), "compiled": previous.get("compiled")}
+
+    st = os.stat(xml_path)
+    os.makedirs(os.path.dirname(master_path) or ".", exist_ok=True)
+    run_dir = tempfile.mkdtemp(prefix="contracts_runs.", dir=os.path.dirname(master_path) or ".")
+    try:
+        runs, count = spill_sorted_runs(iter_contracts(xml_path, tag_suffix), run_dir)
+        header = {
+            "version": FORMAT_VERSION,
+            "exchange": exchange,
+            "columns": COLUMNS,
+            "count": count,
+            "compiled": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "source": {"path": os.path.abspath(xml_path), "size": st.st_size,
+                       "mtime_ns": st.st_mtime_ns, "sha256": _sha256(xml_path)},
+        }
+
+        diff = None
+        if previous and previous.get("exchange") == exchange:
+            diff = diff_sorted(iter_master(master_path), merge_runs(runs))
+            diff.update({"previous": previous.get("compiled"), "compiled": header["compiled"]})
+
+        write_master(merge_runs(runs), header, master_path)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    if diff is not None:
+        with open(diff_path(master_path), "w") as f:
+            json.dump(diff, f, indent=1)
+        print(f"✅ Compiled {count} contracts in {time.time() - t0:.1f}s "
+              f"(+{len(diff['new'])} new, -{len(diff['removed'])} removed, ~{len(diff['renamed'])} renamed)")
+    else:
+        print(f"✅ Compiled {count} contracts in {time.time() - t0:.1f}s (first run, no diff)")
+    return diff
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python contract_compiler.py <contracts.xml> <tag_suffix> [exchange] [master.jsonl]")
+        sys.exit(1)
+    compile_master(sys.argv[1], sys.argv[2], *sys.argv[3:5])
@@ -0,0 +1,57 @@
+from collections import deque
+from datetime import datetime
+
+# Event kinds used across the backend
+KIND_SYSTEM = "system"
+KIND_STATUS = "status"
+KIND_ALERT = "alert"
+KIND_STOCK = "stock"
+
+
+def select(entries, since=None, symbol=None, kind=None):
+    """Entries newer than `since`, optionally filtered by symbol and kind."""
+    out = []
+    # Entries are in seq order: walk back from the newest until we pass the cursor
+    for entry in reversed(entries):
+        if since is not None and entry["seq"] <= since:
+            break
+        if symbol and entry["symbol"] != symbol:
+            continue
+        if kind and entry["kind"] != kind:
+            continue
+        out.append(entry)
+    out.reverse()
+    return out
+
+
+def oldest_seq(entries, seq):
+    """Seq of the oldest kept entry (`seq` + 1 when nothing is kept)."""
+    return entries[0]["seq"] if entries else seq + 1
+
+
+class EventLog:
+    """
+    Fixed-capacity log (deque, no copy on append) with a global sequence per entry.
+    """
+
+    def __init__(self, capacity=300):
+        self.entries = deque(maxlen=capacity)
+        self.seq = 0
+
+    def append(self, message, symbol=None, kind=KIND_SYSTEM):
+        self.seq += 1
+        entry = {
+            "seq": self.seq,
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "message": message,
+            "symbol": symbol,
+            "kind": kind
+        }
+        self.entries.append(entry)
+        return entry
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
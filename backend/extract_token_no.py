@@ -1,105 +1,113 @@
-import xml.etree.ElementTree as ET
 import json
 import os
 
-def parse_contracts(xml_path, tag_suffix):
-    contracts = []
-    # Using iterparse for memory efficiency (file is 500MB+)
-    context = ET.iterparse(xml_path, events=('end',))
-    
-    # We are interested in NIFTY and BANKNIFTY for now to keep it lean
-    # Added SENSEX (BSX) and BANKEX (BKX) aliases
-    # targets = {'NIFTY', 'BANKNIFTY', 'FINNIFTY', 'SENSEX', 'BANKEX', 'BSX', 'BKX'}
-    targets = {
-        'ADANIENT',
-        'ADANIPORTS',
-        'APOLLOHOSP',
-        'ASIANPAINT',
-        'AXISBANK',
-        'BAJAJ-AUTO',
-        'BAJFINANCE',
-        'BAJAJFINSV',
-        'BEL',
-        'BHARTIARTL',
-        'CIPLA',
-        'COALINDIA',
-        'DRREDDY',
-        'EICHERMOT',
-        'GRASIM',
-        'HCLTECH',
-        'HDFCBANK',
-        'HDFCLIFE',
-        'HINDALCO',
-        'HINDUNILVR',
-        'ICICIBANK',
-        'INFY',
-        'INDIGO',
-        'ITC',
-        'JIOFIN',
-        'JSWSTEEL',
-        'KOTAKBANK',
-        'LT',
-        'M&M',
-        'MARUTI',
-        'MAXHEALTH',
-        'NESTLEIND',
-        'NTPC',
-        'ONGC',
-        'POWERGRID',
-        'RELIANCE',
-        'SBILIFE',
-        'SBIN',
-        'SHRIRAMFIN',
-        'SUNPHARMA',
-        'TCS',
-        'TATACONSUM',
-        'TATAMOTORS',
-        'TATASTEEL',
-        'TECHM',
-        'TITAN',
-        'TRENT',
-        'ULTRACEMCO',
-        'WIPRO',
-        'ETERNAL'
-    }
+from contract_compiler import compile_master, lookup
 
+# We are interested in NIFTY and BANKNIFTY for now to keep it lean
+# Added SENSEX (BSX) and BANKEX (BKX) aliases
+# TARGETS = {'NIFTY', 'BANKNIFTY', 'FINNIFTY', 'SENSEX', 'BANKEX', 'BSX', 'BKX'}
+TARGETS = {
+    'ADANIENT',
+    'ADANIPORTS',
+    'APOLLOHOSP',
+    'ASIANPAINT',
+    'AXISBANK',
+    'BAJAJ-AUTO',
+    'BAJFINANCE',
+    'BAJAJFINSV',
+    'BEL',
+    'BHARTIARTL',
+    'CIPLA',
+    'COALINDIA',
+    'DRREDDY',
+    'EICHERMOT',
+    'GRASIM',
+    'HCLTECH',
+    'HDFCBANK',
+    'HDFCLIFE',
+    'HINDALCO',
+    'HINDUNILVR',
+    'ICICIBANK',
+    'INFY',
+    'INDIGO',
+    'ITC',
+    'JIOFIN',
+    'JSWSTEEL',
+    'KOTAKBANK',
+    'LT',
+    'M&M',
+    'MARUTI',
+    'MAXHEALTH',
+    'NESTLEIND',
+    'NTPC',
+    'ONGC',
+    'POWERGRID',
+    'RELIANCE',
+    'SBILIFE',
+    'SBIN',
+    'SHRIRAMFIN',
+    'SUNPHARMA',
+    'TCS',
+    'TATACONSUM',
+    'TATAMOTORS',
+    'TATASTEEL',
+    'TECHM',
+    'TITAN',
+    'TRENT',
+    'ULTRACEMCO',
+    'WIPRO',
+    'ETERNAL'
+}
 
-    seen_symbols = set()
-    count = 0
+def touches_targets(diff):
+    """True if a compile diff adds, removes or renames a contract of a target symbol."""
+    for row in diff["new"] + diff["removed"]:
+        if row["s"] in TARGETS:
+            return True
+    return any(r["from"]["s"] in TARGETS or r["to"]["s"] in TARGETS for r in diff["renamed"])
 
-    for event, elem in context:
-        if elem.tag.endswith(tag_suffix):
-            data = {}
-            for child in elem:
-                tag = child.tag.split('}')[-1]
-                data[tag] = (child.text or "").strip()
-            
-            symbol = data.get('Symbol', '')
-            
-            if symbol in targets:
-            # if symbol in targets and symbol not in seen_symbols:
-                # We only need a few fields for the search
-                refined = {
-                    't': data.get('TokenNo'),
-                    's': symbol,
-                    # 'e': data.get('ExpiryDate'),
-                    # 'st': data.get('StrikePrice'),
-                    'p': data.get('Series'), # CE/PE or XX/Futures
-                    # 'd': data.get('SymbolDesc') or data.get('SymbolDescription')
-                }
-                contracts.append(refined)
-                seen_symbols.add(symbol)
-                count += 1
-            
-            # Periodically report progress
-            if count % 10000 == 0 and count > 0:
-                print(f"Parsed {count} records from {tag_suffix}...")
-                
-            # Clear element to save memory
-            elem.clear()
-            
+def target_contracts(exchange):
+    """Target contracts of one exchange, read from its compiled master by index."""
+    contracts = []
+    for symbol, rows in lookup(sorted(TARGETS), exchange).items():
+        for row in rows:
+            # We only need a few fields for the search
+            contracts.append({
+                't': row['t'],
+                's': symbol,
+                'p': row['p'], # CE/PE or XX/Futures
+            })
     return contracts
 
+def refresh_contracts(mappings, out_file):
+    """
+    Compile each exchange's XML into its master (an unchanged XML is skipped)
+    and rewrite out_file from the masters only when a target contract changed.
+    Returns the number of contracts written, or None when out_file was kept.
+    """
+    rebuild = not os.path.exists(out_file)
+    for m in mappings:
+        print(f"Compiling {m['xml']}...")
+        diff = compile_master(m["xml"], m["tag_suffix"], m["exch_code"])
+        if diff is None or touches_targets(diff):
+            rebuild = True
+
+    if not rebuild:
+        print(f"No target contracts changed, {out_file} left as is")
+        return None
+
+    all_contracts = []
+    for m in mappings:
+        all_contracts.extend(target_contracts(m["exch_code"]))
+
+    tmp = out_file + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(all_contracts, f)
+    os.replace(tmp, out_file)
+
+    print(f"Finished. Extracted {len(all_contracts)} total contracts to {out_file}")
+    return len(all_contracts)
+
 if __name__ == "__main__":
     # List of potential paths to check for each file type
     # It will use the first one that exists
@@ -138,23 +146,5 @@ if __name__ == "__main__":
         print("Warning: No valid (non-empty) BSEFO.xml found in known paths.")
     
     out_file = r"C:\Users\SMARTTOUCH\Downloads\contracts_nsefo.json"
-    
-    all_contracts = []
-    
-    for m in mappings:
-        if os.path.exists(m["xml"]):
-            print(f"Parsing {m['xml']}...")
-            contracts = parse_contracts(m["xml"], m["tag_suffix"])
-            all_contracts.extend(contracts)
-        else:
-            print(f"Warning: {m['xml']} not found.")
 
-    # Sort combined contracts by ExpiryDate
-    print("Sorting all contracts by expiry...")
-    # all_contracts.sort(key=lambda x: x['e'])
-            
-    with open(out_file, 'w') as f:
-        print(all_contracts)
-        json.dump(all_contracts, f)
-    
-    print(f"Finished. Extracted {len(all_contracts)} total contracts to {out_file}")
+    refresh_contracts(mappings, out_file)
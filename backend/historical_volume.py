@@ -1,51 +1,88 @@
-import json
 import statistics
-from collections import defaultdict
+import threading
 
 
 class HistoricalVolumeLoader:
-    def __init__(self, filepath):
-        self.filepath = filepath
+    def __init__(self, store):
+        self.store = store   # HistoryStore
+        self.metrics = {}
+        self.last_market_date = None   # newest last_date across all symbols
+        self.revision = 0              # store revision the cache reflects
+        self.lock = threading.RLock()  # re-entered by callers that refresh under it
+
+    @staticmethod
+    def compute_metrics(rows):
+        """Baseline metrics from one symbol's [(date, volume)] rows, oldest first."""
+        vols = [v for _, v in rows]
+
+        # Include symbols with any data (even 1 day)
+        if len(vols) < 1:
+            return None
+
+        # Use ALL available data for calculations (up to 1 year)
+        return {
+            "window_mean": statistics.mean(vols),
+            "window_std": max(statistics.pstdev(vols), 1),  # avoid zero
+            "window_p90": sorted(vols)[int(0.9 * len(vols))],
+            "prev_day": vols[-1],
+            "last_date": rows[-1][0],
+            "weekly_avg": sum(vols[-5:]) / min(5, len(vols)),
+            "monthly_avg": sum(vols) / len(vols), # Now represents total average
+            "data_status": "OK" if len(vols) >= 20 else "INSUFFICIENT",
+            "available_days": len(vols),
+            "historical_series": [
+                {"time": d, "value": v}
+                for d, v in rows
+            ]
+        }
+
+    def _track_market_date(self, metrics):
+        last = metrics.get("last_date")
+        if last and (self.last_market_date is None or last > self.last_market_date):
+            self.last_market_date = last
 
     def load(self):
-        with open(self.filepath, "r") as f:
-            raw = json.load(f)
-
-        grouped = defaultdict(list)
-
-        # Group by symbol
-        for row in raw:
-            grouped[row["symbol"]].append({
-                "date": row["date"],
-                "volume": row["volume"]
-            })
-
-        metrics = {}
-
-        for symbol, rows in grouped.items():
-            # Sort by date
-            rows.sort(key=lambda x: x["date"])
-            vols = [r["volume"] for r in rows]
-
-            # Include symbols with any data (even 1 day)
-            if len(vols) < 1:
-                continue
-            
-            # Use ALL available data for calculations (up to 1 year)
-            metrics[symbol] = {
-                "window_mean": statistics.mean(vols),
-                "window_std": max(statistics.pstdev(vols), 1),  # avoid zero
-                "window_p90": sorted(vols)[int(0.9 * len(vols))],
-                "prev_day": vols[-1],
-                "last_date": rows[-1]["date"],
-                "weekly_avg": sum(vols[-5:]) / min(5, len(vols)),
-                "monthly_avg": sum(vols) / len(vols), # Now represents total average
-                "data_status": "OK" if len(vols) >= 20 else "INSUFFICIENT",
-                "available_days": len(vols),
-                "historical_series": [
-                    {"time": r["date"], "value": r["volume"]}
-                    for r in rows
-                ]
-            }
-
-        return metrics
\ No newline at end of file
+        """Full (re)computation of every symbol. Used once at startup."""
+        with self.lock:
+            revision = self.store.revision
+            metrics = {}
+            self.last_market_date = None
+
+            # Rows come back grouped by symbol and sorted by date
+            for symbol, rows in self.store.all_by_symbol().items():
+                m = self.compute_metrics(rows)
+                if m:
+                    metrics[symbol] = m
+                    self._track_market_date(m)
+
+            self.metrics = metrics
+            self.revision = revision
+            return metrics
+
+    def restore(self, metrics, last_market_date):
+        """Adopt metrics from a validated warm-start snapshot instead of load()."""
+        with self.lock:
+            self.metrics = metrics
+            self.last_market_date = last_market_date
+            self.revision = self.store.revision
+            return metrics
+
+    def refresh(self, symbols=None):
+        """
+        Recompute only symbols whose rows changed since the last load/refresh
+        (plus any listed in `symbols`). Returns {symbol: metrics} for those.
+        """
+        with self.lock:
+            revision = self.store.revision
+            todo = self.store.changed_since(self.revision) | set(symbols or ())
+
+            updated = {}
+            for symbol in todo:
+                m = self.compute_metrics(self.store.symbol_rows(symbol))
+                if m:
+                    self.metrics[symbol] = m
+                    self._track_market_date(m)
+                    updated[symbol] = m
+
+            self.revision = revision
+            return updated
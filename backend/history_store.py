@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DB_PATH = os.path.join(DATA_DIR, "historical_volumes.db")
+LEGACY_JSON_PATH = os.path.join(DATA_DIR, "historical_volumes.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS volumes (
+    symbol TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    volume INTEGER NOT NULL,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS volumes_by_date ON volumes (date);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class HistoryStore:
+    """
+    Daily volumes keyed by (symbol, date) in SQLite.
+    Writes are append-only (INSERT OR IGNORE) and per-symbol reads use the
+    primary key, so neither ingest nor startup rescans the whole history.
+    """
+
+    def __init__(self, db_path=DB_PATH, legacy_json=LEGACY_JSON_PATH):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+
+        # Bumped by every append that added rows; readers remember the last
+        # revision they saw and ask for symbols changed after it
+        self.revision = 0
+        self.changed = {}   # symbol -> revision of its last added rows
+        self.counts = {}    # symbol -> stored rows, kept current by append()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.counts = dict(self.conn.execute("SELECT symbol, COUNT(*) FROM volumes GROUP BY symbol"))
+
+        if legacy_json:
+            self.migrate_from_json(legacy_json)
+
+    # ---------------- MIGRATION ----------------
+
+    def migrate_from_json(self, path):
+        """One-time import of the old historical_volumes.json list."""
+        if self.get_meta("migrated_json") or not os.path.exists(path):
+            return 0
+
+        try:
+            with open(path, "r") as f:
+                content = f.read().strip()
+            records = json.loads(content) if content else []
+        except Exception as e:
+            print(f"⚠️ Could not migrate {path}: {e}")
+            return 0
+
+        added = self.append(records)
+        self.set_meta("migrated_json", path)
+        print(f"✅ Migrated {added} records from {os.path.basename(path)} to {os.path.basename(self.db_path)}")
+        return added
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ---------------- WRITES ----------------
+
+    def append(self, records):
+        """
+        Insert {"symbol", "date", "volume"} records, skipping keys that already exist.
+        Returns the records actually added.
+        """
+        inserted = []
+        with self.lock:
+            with self.conn:
+                cur = self.conn.cursor()
+                for r in records:
+                    cur.execute(
+                        "INSERT OR IGNORE INTO volumes (symbol, date, volume) VALUES (?, ?, ?)",
+                        (r["symbol"], r["date"], r["volume"])
+                    )
+                    if cur.rowcount > 0:
+                        inserted.append(r["symbol"])
+
+            if inserted:
+                self.revision += 1
+                for symbol in inserted:
+                    self.changed[symbol] = self.revision
+                    self.counts[symbol] = self.counts.get(symbol, 0) + 1
+            return len(inserted)
+
+    def changed_since(self, revision):
+        """Symbols with rows added after `revision`."""
+        with self.lock:
+            return {s for s, rev in self.changed.items() if rev > revision}
+
+    # ---------------- READS ----------------
+
+    def has(self, symbol, date):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM volumes WHERE symbol = ? AND date = ?", (symbol, date)
+            ).fetchone() is not None
+
+    def count(self, symbol):
+        """Stored rows for `symbol` (in-memory counter, no query)."""
+        return self.counts.get(symbol, 0)
+
+    def missing_on(self, date, symbols):
+        """Subset of `symbols` with no row for `date` (one lookup on the date index)."""
+        with self.lock:
+            present = {r[0] for r in self.conn.execute(
+                "SELECT symbol FROM volumes WHERE date = ?", (date,))}
+        return {s for s in symbols if s not in present}
+
+    def symbols(self):
+        return list(self.counts)
+
+    def max_date(self):
+        with self.lock:
+            return self.conn.execute("SELECT MAX(date) FROM volumes").fetchone()[0]
+
+    def symbol_rows(self, symbol):
+        """[(date, volume)] for one symbol, oldest first (primary key range scan)."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT date, volume FROM volumes WHERE symbol = ? ORDER BY date", (symbol,)
+            ).fetchall()
+
+    def all_by_symbol(self):
+        """{symbol: [(date, volume)]} in one ordered pass over the primary key."""
+        grouped = {}
+        with self.lock:
+            cursor = self.conn.execute("SELECT symbol, date, volume FROM volumes ORDER BY symbol, date")
+            for symbol, date, volume in cursor:
+                grouped.setdefault(symbol, []).append((date, volume))
+        return grouped
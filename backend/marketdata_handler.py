@@ -1,33 +1,148 @@
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
 from alert_engine import AlertEngine
 from notifier import Notifier
 
 class MarketDataHandler:
-    def __init__(self, storage):
+    """
+    Staged tick pipeline: the websocket thread only enqueues, a processor
+    thread drains the queue in micro-batches (latest TTQ per token wins).
+    """
+
+    def __init__(self, storage, max_batch=5000, batch_wait=0.02, max_queue=100_000):
         self.storage = storage
         Notifier.storage = storage
         self.alert_engine = AlertEngine(Notifier)
 
+        # Bounded: if the processor stalls, the oldest ticks are dropped (see handle)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait   # seconds to let a burst accumulate
+        self._thread = None
+
+        # 📈 PIPELINE STATS
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.recent_batches = deque(maxlen=100)   # (size, unique_tokens, seconds)
+
+    # ---------------- RECEIVE (websocket thread) ----------------
+
     def handle(self, data):
+        token = data.get("Tkn")
+        if token is None:
+            return
+        self.received += 1
+        item = (str(token), data.get("TTQ", 0))
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # TTQ is cumulative, so a token's next tick makes up for its dropped one
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+
+    # ---------------- PROCESS (pipeline thread) ----------------
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        """Block for the first message, then collect whatever else is waiting."""
+        batch = [self.queue.get()]
+        if self.batch_wait:
+            time.sleep(self.batch_wait)
         try:
-            token = str(data.get("Tkn"))
-            ttq = data.get("TTQ", 0)
+            while len(batch) < self.max_batch:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._drain()
+            try:
+                with self.storage.lock:
+                    self.process_batch(batch)
+                self.storage.publish_snapshot()
+            except Exception as e:
+                print(f"Error handling tick batch: {e}")
+
+    def process_batch(self, batch):
+        """Apply a list of (token, ttq) messages: one clock read, one alert pass per symbol."""
+        started = time.perf_counter()
+        now = datetime.now()
 
-            if not token:
-                return
+        # Coalesce: keep only the latest TTQ per token
+        latest = {}
+        for token, ttq in batch:
+            latest[token] = ttq
 
-            self.storage.reset_if_new_day()
-            self.storage.update_tick(token, ttq)
+        self.storage.reset_if_new_day(now)
 
-            # 🕒 Record history for minute-level tracking
-            symbol = self.storage.symbols.get(token)
-            if symbol:
-                self.storage.record_volume(symbol, ttq)
+        touched = []
+        for token, ttq in latest.items():
+            # One bad message only loses its own tick, not the rest of the batch
+            try:
+                self.storage.update_tick(token, ttq, now=now)
 
-            # Trigger alert evaluation
-            row = self.storage.symbol_data.get(symbol)
-            if not row:
-                return
+                # 🕒 Record history for minute-level tracking
+                symbol = self.storage.symbols.get(token)
+                if symbol:
+                    self.storage.record_volume(symbol, ttq, now)
+                    touched.append(symbol)
+            except Exception as e:
+                self.failed += 1
+                print(f"Error handling tick {token} (TTQ={ttq!r}): {e}")
 
-            self.alert_engine.evaluate(symbol, row, self.storage)
+        # Trigger alert evaluation once per touched symbol
+        try:
+            self.alert_engine.evaluate_window_batch(touched, self.storage, now)
         except Exception as e:
-            print(f"Error handling tick: {e}")
+            print(f"Error evaluating window alerts: {e}")
+        for symbol in touched:
+            try:
+                row = self.storage.symbol_data.get(symbol)
+                if row:
+                    self.alert_engine.evaluate_user_alerts(symbol, row, self.storage)
+            except Exception as e:
+                print(f"Error evaluating alerts for {symbol}: {e}")
+
+        self.processed += len(batch)
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.recent_batches.append((len(batch), len(latest), time.perf_counter() - started))
+
+    def stats(self):
+        recent = list(self.recent_batches)
+        sizes = [b[0] for b in recent]
+        return {
+            "queue_depth": self.queue.qsize(),
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "max_batch": self.max_batch_seen,
+            "avg_batch": round(sum(sizes) / len(sizes), 1) if sizes else 0,
+            "avg_unique_tokens": round(sum(b[1] for b in recent) / len(recent), 1) if recent else 0,
+            "avg_batch_ms": round(1000 * sum(b[2] for b in recent) / len(recent), 2) if recent else 0,
+            "running": bool(self._thread and self._thread.is_alive())
+        }
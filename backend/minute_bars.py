@@ -0,0 +1,62 @@
+from array import array
+from datetime import time as datetime_time
+
+# NSE cash session: 09:15 → 15:30 = 375 one-minute bars
+SESSION_OPEN = datetime_time(9, 15)
+SESSION_MINUTES = 375
+_OPEN_MINUTE = SESSION_OPEN.hour * 60 + SESSION_OPEN.minute
+
+
+def in_session(t):
+    """True for a time/datetime inside 09:15 → 15:30 (the minutes that have a bar)."""
+    return 0 <= t.hour * 60 + t.minute - _OPEN_MINUTE < SESSION_MINUTES
+
+
+def session_minute(t):
+    """
+    Minute index since 09:15 for a time/datetime, clamped to the session
+    (pre-open lands on bar 0, post-close on the last bar). For reads; writes
+    outside the session are dropped by the caller.
+    """
+    idx = t.hour * 60 + t.minute - _OPEN_MINUTE
+    if idx < 0:
+        return 0
+    if idx >= SESSION_MINUTES:
+        return SESSION_MINUTES - 1
+    return idx
+
+
+class MinuteRing:
+    """
+    Preallocated per-symbol bars of cumulative volume, one slot per session minute.
+    Gaps are carried forward on write so every read is a single index.
+    """
+    __slots__ = ("vols", "last", "day")
+
+    def __init__(self):
+        self.vols = array("q", bytes(8 * SESSION_MINUTES))
+        self.last = -1      # highest minute written today
+        self.day = None
+
+    def reset(self, day):
+        self.last = -1
+        self.day = day
+
+    def record(self, day, minute, volume):
+        if day != self.day:
+            self.reset(day)
+
+        if minute > self.last:
+            # Carry the previous bar forward across minutes with no ticks
+            fill = self.vols[self.last] if self.last >= 0 else 0
+            for i in range(self.last + 1, minute):
+                self.vols[i] = fill
+            self.last = minute
+
+        self.vols[minute] = volume
+
+    def volume_at(self, day, minute):
+        """Volume at minute (or closest previous bar), 0 if nothing recorded yet."""
+        if day != self.day or self.last < 0:
+            return 0
+        return self.vols[min(minute, self.last)]
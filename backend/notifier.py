@@ -1,6 +1,9 @@
+from event_log import KIND_ALERT
+
+
 class Notifier:
     storage = None
 
     @classmethod
     def notify(cls, symbol, message):
-        cls.storage.add_log(f"ALERT [{symbol}]: {message}")
+        cls.storage.add_log(f"ALERT [{symbol}]: {message}", symbol=symbol, kind=KIND_ALERT)
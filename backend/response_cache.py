@@ -0,0 +1,75 @@
+import threading
+
+from flask import Response
+
+from wire_formats import COMPRESSORS, MIME_JSON, encode
+
+# Below this size compression costs more than it saves
+COMPRESS_MIN_BYTES = 1024
+
+
+class ResponseCache:
+    """
+    Serialized bodies built once per state version and shared by every
+    client asking for the same URL and format. Older versions are dropped as
+    soon as a newer one is requested, so memory stays at one version's worth.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.entries = {}   # (request key, mimetype) -> {"etag", "body", encoding: bytes}
+        self.lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+
+    def _entry(self, version, key, mimetype, build):
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+            entry = self.entries.get((key, mimetype))
+            if entry is not None:
+                self.hits += 1
+                return entry
+
+            # Build under the lock: concurrent pollers wait for one serialization
+            body = encode(build(), mimetype)
+            entry = {"etag": f"v{version}-{abs(hash((key, mimetype))):x}", "body": body}
+            self.entries[(key, mimetype)] = entry
+            self.builds += 1
+            return entry
+
+    def _compressed(self, entry, encoding):
+        body = entry.get(encoding)
+        if body is None:
+            with self.lock:
+                body = entry.get(encoding)
+                if body is None:
+                    body = entry[encoding] = COMPRESSORS[encoding](entry["body"])
+        return body
+
+    def respond(self, version, key, build, request, mimetype=MIME_JSON):
+        """Flask response for `key` at `version`: 304, compressed or plain."""
+        entry = self._entry(version, key, mimetype, build)
+        etag = entry["etag"]
+
+        encoding = None
+        if len(entry["body"]) >= COMPRESS_MIN_BYTES:
+            encoding = request.accept_encodings.best_match(list(COMPRESSORS))
+
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        elif encoding:
+            resp = Response(self._compressed(entry, encoding), mimetype=mimetype)
+            resp.headers["Content-Encoding"] = encoding
+        else:
+            resp = Response(entry["body"], mimetype=mimetype)
+
+        resp.set_etag(etag)
+        resp.headers["Vary"] = "Accept, Accept-Encoding"
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    def stats(self):
+        return {"version": self.version, "entries": len(self.entries),
+                "builds": self.builds, "hits": self.hits}
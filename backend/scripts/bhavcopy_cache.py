@@ -0,0 +1,77 @@
+# scripts/bhavcopy_cache.py
+
+import hashlib
+import json
+import os
+import threading
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "bhavcopy_cache")
+
+
+class BhavcopyCache:
+    """
+    Raw bhavcopy zips on disk, content-addressed:
+      objects/<sha[:2]>/<sha256>.zip   the bytes
+      index.json                       {"YYYY-MM-DD": sha256}
+    Identical content is stored once and a corrupt object is simply re-fetched.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self.lock = threading.Lock()
+        self.index = {}
+
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    self.index = json.load(f)
+            except Exception:
+                print("⚠️ Warning: bhavcopy cache index invalid, starting empty.")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".zip")
+
+    def has(self, d):
+        return d.isoformat() in self.index
+
+    def get(self, d):
+        """Cached zip bytes for date `d`, or None."""
+        digest = self.index.get(d.isoformat())
+        if not digest:
+            return None
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                content = f.read()
+        except OSError:
+            return None
+        if hashlib.sha256(content).hexdigest() != digest:
+            return None
+        return content
+
+    def put(self, d, content):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+
+        with self.lock:
+            self.index[d.isoformat()] = digest
+            self._save_index()
+        return digest
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f, indent=0, sort_keys=True)
+        os.replace(tmp, self.index_path)
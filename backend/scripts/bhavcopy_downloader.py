@@ -0,0 +1,186 @@
+# scripts/bhavcopy_downloader.py
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+# Point BHAVCOPY_BASE_URL at a local server to run against fixture zips
+BASE_URL = os.environ.get("BHAVCOPY_BASE_URL", "https://nsearchives.nseindia.com/content/cm/")
+WORKERS = int(os.environ.get("BHAVCOPY_WORKERS", "8"))
+RATE_PER_HOST = float(os.environ.get("BHAVCOPY_RATE", "5"))   # requests / second / host
+RETRIES = 3
+BACKOFF = 0.5   # seconds, doubled per retry
+TIMEOUT = 15
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "*/*"
+}
+
+# Worth retrying: throttling and server-side failures
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Anti-bot blocks; like an HTML challenge page they say nothing about the date
+BLOCKED_STATUS = {401, 403}
+
+
+def bhavcopy_name(target_date):
+    return f"BhavCopy_NSE_CM_0_0_0_{target_date.strftime('%Y%m%d')}_F_0000.csv.zip"
+
+
+# =====================================================
+# RATE LIMIT
+# =====================================================
+
+class HostRateLimiter:
+    """Spaces requests to each host at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# =====================================================
+# DOWNLOADER
+# =====================================================
+
+class BhavcopyDownloader:
+    """
+    Fetches bhavcopy zips for many dates in parallel over one pooled session.
+    fetch() returns the zip bytes, or None when there is no file for that
+    date (holiday/weekend) or every retry failed.
+
+    With a `calendar`, non-trading dates are never requested and 404s are
+    learned (only 404s: blocks and error pages are retried, never recorded);
+    with a `cache`, zips are served from disk and stored after download.
+    """
+
+    def __init__(self, base_url=BASE_URL, workers=WORKERS, rate=RATE_PER_HOST,
+                 retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT,
+                 cache=None, calendar=None):
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(rate)
+        self.cache = cache
+        self.calendar = calendar
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.stats = {"requests": 0, "retries": 0, "found": 0, "missing": 0, "failed": 0,
+                      "blocked": 0, "cached": 0, "skipped": 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def url_for(self, target_date):
+        return self.base_url + bhavcopy_name(target_date)
+
+    def _local(self, target_date):
+        """(resolved, content) without touching the network."""
+        if self.calendar is not None and not self.calendar.is_trading_day(target_date):
+            self._count("skipped")
+            return True, None
+        if self.cache is not None:
+            content = self.cache.get(target_date)
+            if content is not None:
+                self._count("cached")
+                return True, content
+        return False, None
+
+    def fetch(self, target_date):
+        resolved, content = self._local(target_date)
+        if resolved:
+            return content
+        return self._download(target_date)
+
+    def _download(self, target_date):
+        url = self.url_for(target_date)
+        host = urlparse(url).netloc
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count("retries")
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+            self.limiter.wait(host)
+            self._count("requests")
+            try:
+                r = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException:
+                continue
+
+            if r.status_code in RETRY_STATUS:
+                continue
+
+            if r.status_code == 200 and ("zip" in r.headers.get("Content-Type", "") or r.content[:2] == b"PK"):
+                self._count("found")
+                if self.cache is not None:
+                    self.cache.put(target_date, r.content)
+                return r.content
+
+            if r.status_code == 404:
+                # No bhavcopy for this date
+                self._count("missing")
+                if self.calendar is not None:
+                    self.calendar.mark_missing(target_date)
+                return None
+
+            if r.status_code in BLOCKED_STATUS or r.status_code == 200:
+                # Block or challenge page instead of the zip: back off and retry
+                self._count("blocked")
+                continue
+
+            break
+
+        self._count("failed")
+        return None
+
+    def fetch_many(self, dates):
+        """Yield (date, content) in completion order so callers parse while others download."""
+        # Cached and non-trading dates are answered inline; only the rest hit the pool
+        remote = []
+        for d in dates:
+            resolved, content = self._local(d)
+            if resolved:
+                yield d, content
+            else:
+                remote.append(d)
+        if not remote:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(remote))) as pool:
+            futures = {pool.submit(self._download, d): d for d in remote}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,136 @@
+# scripts/eq_partitions.py
+
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+PARTITION_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "eq_partitions")
+
+MAGIC = b"EQP1"
+SUFFIX = ".eqp"
+
+
+def _le(arr):
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+class EqPartitions:
+    """
+    Every EQ row of each ingested bhavcopy, one file per trading date:
+      magic "EQP1" | u32 nrows | u32 symbols_len | symbols (utf8, "\\n" joined, sorted)
+      int64[nrows] volumes (little endian)
+    Symbols are sorted so a lookup is a bisect; decoded partitions sit in a small LRU.
+    """
+
+    def __init__(self, root=PARTITION_DIR, cache_size=64):
+        self.root = root
+        self.cache_size = cache_size
+        self.loaded = OrderedDict()   # date -> (symbols, volumes)
+        self.lock = threading.Lock()
+        self._dates = None
+
+    def _path(self, day):
+        return os.path.join(self.root, day + SUFFIX)
+
+    # ---------------- WRITE ----------------
+
+    def write(self, day, rows):
+        """Store {symbol: volume} for ISO date `day` (replaces any earlier partition)."""
+        symbols = sorted(rows)
+        volumes = _le(array("q", (rows[s] for s in symbols)))
+        blob = "\n".join(symbols).encode()
+
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(day)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<II", len(symbols), len(blob)))
+            f.write(blob)
+            f.write(volumes.tobytes())
+        os.replace(tmp, path)
+
+        with self.lock:
+            self.loaded.pop(day, None)
+            if self._dates is not None and day not in self._dates:
+                self._dates.append(day)
+                self._dates.sort()
+
+    # ---------------- READ ----------------
+
+    def dates(self):
+        """Partitioned ISO dates, oldest first."""
+        with self.lock:
+            if self._dates is None:
+                names = os.listdir(self.root) if os.path.isdir(self.root) else []
+                self._dates = sorted(n[:-len(SUFFIX)] for n in names if n.endswith(SUFFIX))
+            return list(self._dates)
+
+    def has(self, day):
+        return os.path.exists(self._path(day))
+
+    def _load(self, day):
+        with self.lock:
+            part = self.loaded.get(day)
+            if part is not None:
+                self.loaded.move_to_end(day)
+                return part
+
+        try:
+            with open(self._path(day), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if data[:4] != MAGIC:
+            return None
+
+        n, blob_len = struct.unpack_from("<II", data, 4)
+        pos = 12
+        symbols = data[pos:pos + blob_len].decode().split("\n") if n else []
+        pos += blob_len
+        volumes = array("q")
+        volumes.frombytes(data[pos:pos + 8 * n])
+        volumes = _le(volumes)
+        part = (symbols, volumes)
+
+        with self.lock:
+            self.loaded[day] = part
+            while len(self.loaded) > self.cache_size:
+                self.loaded.popitem(last=False)
+        return part
+
+    def volume(self, day, symbol):
+        part = self._load(day)
+        if part is None:
+            return None
+        symbols, volumes = part
+        i = bisect_left(symbols, symbol)
+        if i < len(symbols) and symbols[i] == symbol:
+            return volumes[i]
+        return None
+
+    def records(self, day, symbols):
+        """{"symbol", "date", "volume"} records for the `symbols` present on `day`."""
+        out = []
+        for s in symbols:
+            v = self.volume(day, s)
+            if v is not None:
+                out.append({"symbol": s, "date": day, "volume": v})
+        return out
+
+    def last_seen(self, symbol, lookback=5):
+        """Newest date among the latest `lookback` partitions that lists `symbol`."""
+        for day in reversed(self.dates()[-lookback:]):
+            if self.volume(day, symbol) is not None:
+                return day
+        return None
@@ -1,10 +1,8 @@
 # scripts/ingest_bhavcopy.py
 
-import requests
 import zipfile
 import io
 import csv
-import json
 import os
 from datetime import date, timedelta
 
@@ -14,129 +12,233 @@ from datetime import date, timedelta
 
 DAYS_TO_BACKFILL = 365   # ~2 months
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0",
-    "Accept": "*/*"
-}
+# Keep every EQ row of each downloaded bhavcopy (not just the wanted symbols)
+EQ_PARTITIONS = os.environ.get("BHAVCOPY_EQ_PARTITIONS", "1") == "1"
 
-OUTPUT_FILE = os.path.join(
-    os.path.dirname(__file__),
-    "..",
-    "data",
-    "historical_volumes.json"
-)
-
-# ---- Try to import from project config ----
+# ---- Try to import project config (its NIFTY 50 list is parsed lazily) ----
 try:
-    from config import NIFTY50_STOCKS
-    NIFTY_SYMBOLS = {s["symbol"] for s in NIFTY50_STOCKS}
+    import config
 except ImportError:
     # Fallback if run standalone from scripts/
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
     try:
-        import sys
-        sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
-        from config import NIFTY50_STOCKS
-        NIFTY_SYMBOLS = {s["symbol"] for s in NIFTY50_STOCKS}
+        import config
     except Exception:
-        NIFTY_SYMBOLS = set() # Empty fallback
+        config = None
+
+from history_store import HistoryStore
+from scripts.bhavcopy_cache import BhavcopyCache
+from scripts.bhavcopy_downloader import BhavcopyDownloader
+from scripts.eq_partitions import EqPartitions
+from scripts.trading_calendar import TradingCalendar
+
+
+_nifty_symbols = None
 
+def nifty_symbols():
+    """
+    Default symbol set when no symbols are given, resolved on first use so
+    importing this module does not parse contracts_nsefo.json.
+    """
+    global _nifty_symbols
+    if _nifty_symbols is None:
+        try:
+            _nifty_symbols = {s["symbol"] for s in config.NIFTY50_STOCKS}
+        except Exception:
+            _nifty_symbols = set() # Empty fallback
+    return _nifty_symbols
 
 # =====================================================
-# SAFE JSON HELPERS
+# HISTORY STORE
 # =====================================================
 
-def load_existing():
-    if not os.path.exists(OUTPUT_FILE):
-        return []
+_store = None
 
-    try:
-        with open(OUTPUT_FILE, "r") as f:
-            content = f.read().strip()
-            if not content:
-                return []
-            return json.loads(content)
-    except Exception:
-        print("⚠️ Warning: historical_volumes.json invalid, resetting.")
-        return []
+def get_store():
+    """
+    Shared HistoryStore (SQLite, keyed by symbol+date).
+    The first call migrates the old historical_volumes.json once.
+    """
+    global _store
+    if _store is None:
+        _store = HistoryStore()
+    return _store
+
+_partitions = None
+
+def get_partitions():
+    """Shared per-date EQ partitions (every EQ symbol of each ingested bhavcopy)."""
+    global _partitions
+    if _partitions is None:
+        _partitions = EqPartitions()
+    return _partitions
 
-def save_existing(data):
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+_downloader = None
+
+def get_downloader():
+    """
+    Shared pooled downloader (workers/rate/base URL from BHAVCOPY_* env vars)
+    backed by the on-disk zip cache and the trading calendar.
+    """
+    global _downloader
+    if _downloader is None:
+        _downloader = BhavcopyDownloader(cache=BhavcopyCache(), calendar=TradingCalendar())
+    return _downloader
 
 # =====================================================
 # INGESTION (SINGLE DAY)
 # =====================================================
 
-def ingest_for_date(target_date, existing, allowed_symbols=None):
-    date_str = target_date.strftime("%Y%m%d")
+def parse_eq_rows(content):
+    """All EQ rows of one bhavcopy zip -> (trade_date, {symbol: volume})."""
+    rows = {}
+    trade_date = None
+
+    with zipfile.ZipFile(io.BytesIO(content)) as z:
+        csv_name = z.namelist()[0]
 
-    bhavcopy_url = (
-        "https://nsearchives.nseindia.com/content/cm/"
-        f"BhavCopy_NSE_CM_0_0_0_{date_str}_F_0000.csv.zip"
-    )
+        with z.open(csv_name) as csv_file:
+            reader = csv.DictReader(io.TextIOWrapper(csv_file))
+
+            for row in reader:
+                series = row.get("SctySrs", "").strip().upper()
+                if series != "EQ":
+                    continue
+
+                try:
+                    volume = int(row.get("TtlTradgVol"))
+                except Exception:
+                    continue
+
+                rows[row.get("TckrSymb", "").strip().upper()] = volume
+                trade_date = trade_date or row.get("TradDt")
+
+    return trade_date, rows
+
+def select_records(trade_date, rows, allowed_symbols=None):
+    """
+    {"symbol", "date", "volume"} records for the wanted symbols.
+    If specific symbols allowed, only those; otherwise the NIFTY 50 symbols.
+    """
+    wanted = allowed_symbols or nifty_symbols()
+    return [
+        {"symbol": s, "date": trade_date, "volume": rows[s]}
+        for s in wanted if s in rows
+    ]
+
+def parse_bhavcopy(content, allowed_symbols=None):
+    """EQ rows of one bhavcopy zip as {"symbol", "date", "volume"} records."""
+    trade_date, rows = parse_eq_rows(content)
+    return select_records(trade_date, rows, allowed_symbols)
+
+def append_records(target_date, new_records, store):
+    # Append-only: keys already in the store are skipped by the primary key
+    added = store.append(new_records) if new_records else 0
+
+    if added:
+        print(f"✅ {target_date} → added {added} records")
+        if verbose_output:
+             print(f"   Sample: {new_records[0]}")
+        return True
+
+    return False
+
+def ingest_content(target_date, content, store, allowed_symbols=None):
+    """
+    Parse a downloaded zip and append its records. True if anything was added.
+    In full-universe mode every EQ row is also kept as a per-date partition,
+    so symbols added later backfill without downloading again.
+    """
+    if not content:
+        return False
 
     try:
-        r = requests.get(bhavcopy_url, headers=HEADERS, timeout=15)
+        trade_date, rows = parse_eq_rows(content)
     except Exception:
         return False
 
-    if r.status_code != 200 or "zip" not in r.headers.get("Content-Type", ""):
+    if not rows:
         return False
 
-    existing_keys = {(r["symbol"], r["date"]) for r in existing}
-    new_records = []
+    if EQ_PARTITIONS:
+        try:
+            get_partitions().write(target_date.isoformat(), rows)
+        except OSError as e:
+            print(f"⚠️ Could not write EQ partition for {target_date}: {e}")
 
-    try:
-        with zipfile.ZipFile(io.BytesIO(r.content)) as z:
-            csv_name = z.namelist()[0]
-
-            with z.open(csv_name) as csv_file:
-                reader = csv.DictReader(io.TextIOWrapper(csv_file))
-
-                for row in reader:
-                    symbol = row.get("TckrSymb", "").strip().upper()
-                    series = row.get("SctySrs", "").strip().upper()
-
-                    if series != "EQ":
-                        continue
-
-                    # If specific symbols allowed, only process those
-                    # Otherwise default to NIFTY_SYMBOLS list
-                    if allowed_symbols:
-                         if symbol not in allowed_symbols:
-                             continue
-                    elif symbol not in NIFTY_SYMBOLS:
-                        continue
-
-                    try:
-                        volume = int(row.get("TtlTradgVol"))
-                        trade_date = row.get("TradDt")
-                    except Exception:
-                        continue
-
-                    key = (symbol, trade_date)
-                    if key in existing_keys:
-                        continue
-
-                    new_records.append({
-                        "symbol": symbol,
-                        "date": trade_date,
-                        "volume": volume
-                    })
+    return append_records(target_date, select_records(trade_date, rows, allowed_symbols), store)
 
-    except Exception:
+def ingest_partition(target_date, store, allowed_symbols=None):
+    """Local path: take the wanted symbols from an existing EQ partition."""
+    wanted = allowed_symbols or nifty_symbols()
+    records = get_partitions().records(target_date.isoformat(), wanted)
+    return append_records(target_date, records, store)
+
+def needs_download(target_date, store, allowed_symbols=None):
+    """False when every wanted (symbol, date) key is already stored."""
+    wanted = allowed_symbols or nifty_symbols()
+    return not wanted or bool(store.missing_on(target_date.isoformat(), wanted))
+
+def ingest_for_date(target_date, store, allowed_symbols=None):
+    if not needs_download(target_date, store, allowed_symbols):
         return False
 
-    if new_records:
-        existing.extend(new_records)
-        save_existing(existing)
-        print(f"✅ {target_date} → added {len(new_records)} records")
-        if verbose_output:
-             print(f"   Sample: {new_records[0]}")
-        return True
+    if EQ_PARTITIONS and get_partitions().has(target_date.isoformat()):
+        return ingest_partition(target_date, store, allowed_symbols)
 
-    return False
+    content = get_downloader().fetch(target_date)
+    return ingest_content(target_date, content, store, allowed_symbols)
+
+# =====================================================
+# INGESTION (MANY DAYS)
+# =====================================================
+
+def ingest_dates(dates, store, allowed_symbols=None):
+    """
+    Ingest `dates`: partitioned dates are read locally, the rest are
+    downloaded concurrently and each zip ingested as soon as it arrives.
+    Parsing and store writes stay on the calling thread. Returns the dates that added data.
+    """
+    todo = [d for d in dates if needs_download(d, store, allowed_symbols)]
+    ingested = []
+
+    remote = []
+    for target_date in todo:
+        if EQ_PARTITIONS and get_partitions().has(target_date.isoformat()):
+            if ingest_partition(target_date, store, allowed_symbols):
+                ingested.append(target_date)
+        else:
+            remote.append(target_date)
+
+    for target_date, content in get_downloader().fetch_many(remote):
+        if ingest_content(target_date, content, store, allowed_symbols):
+            ingested.append(target_date)
+
+    return ingested
+
+def recently_traded(symbol, lookback=5, max_age_days=7):
+    """
+    Offline check against the EQ partitions: True/False if `symbol` traded as
+    EQ in the latest `lookback` sessions, None when the partitions are not current.
+    """
+    dates = get_partitions().dates()
+    if not dates or (date.today() - date.fromisoformat(dates[-1])).days > max_age_days:
+        return None
+    return get_partitions().last_seen(symbol, lookback) is not None
+
+def date_windows(today, max_days, size):
+    """
+    Descending windows of `size` candidate trading days within `max_days`
+    calendar days back from yesterday (weekends/holidays/known gaps skipped).
+    """
+    calendar = get_downloader().calendar
+    if calendar is not None:
+        days = calendar.trading_days_back(today, max_days, max_days)
+    else:
+        days = [today - timedelta(days=i) for i in range(1, max_days + 1)]
+    for i in range(0, len(days), size):
+        yield days[i:i + size]
 
 # =====================================================
 # BACKFILL CONTROLLER
@@ -145,12 +247,11 @@ verbose_output = False
 
 def backfill_last_two_months():
     print("Starting bhavcopy backfill")
-    existing = load_existing()
+    store = get_store()
     today = date.today()
 
-    for i in range(1, DAYS_TO_BACKFILL + 1):
-        target_date = today - timedelta(days=i)
-        ingest_for_date(target_date, existing)
+    dates = [today - timedelta(days=i) for i in range(1, DAYS_TO_BACKFILL + 1)]
+    ingest_dates(dates, store)
 
     print("✅ Backfill completed")
 
@@ -161,7 +262,7 @@ def backfill_symbol(symbol, days=30):
     Used when a user adds a stock dynamically.
     """
     print(f"🚀 Starting backfill for single symbol: {symbol} ({days} trading days)")
-    existing = load_existing()
+    store = get_store()
     today = date.today()
     
     # We pass a set containing just this symbol as allowed
@@ -172,31 +273,29 @@ def backfill_symbol(symbol, days=30):
 
     trading_days_found = 0
     max_search_days = 730  # Cap at 2 years max to prevent infinite loops
+
+    # Fetch a window of trading days in parallel, then check whether we have enough
+    window = max(get_downloader().workers * 2, 8)
     
-    for i in range(1, max_search_days + 1):
-        target_date = today - timedelta(days=i)
-        
-        # Check if we found data for this date
-        if ingest_for_date(target_date, existing, allowed_symbols=allowed):
-            trading_days_found += 1
-            print(f"  Found trading day {trading_days_found}/{days} for {target_date}")
+    for dates in date_windows(today, max_search_days, window):
+        found = ingest_dates(dates, store, allowed_symbols=allowed)
+        trading_days_found += len(found)
+        if found:
+            print(f"  Found trading days {trading_days_found}/{days} (back to {min(found)})")
             
-            # Stop once we have enough trading days
-            if trading_days_found >= days:
-                print(f"✅ Found {days} trading days, stopping search")
-                break
+        # Stop once we have enough trading days
+        if trading_days_found >= days:
+            print(f"✅ Found {days} trading days, stopping search")
+            break
     
     if trading_days_found < days:
         print(f"⚠️ Only found {trading_days_found} trading days (requested: {days})")
     
-    # Reload and verify the data
-    existing = load_existing()
-    symbol_records = [r for r in existing if r["symbol"] == symbol]
+    # Verify the data
+    total = store.count(symbol)
     
-    if symbol_records:
-        # Sort by date descending
-        symbol_records.sort(key=lambda x: x["date"], reverse=True)
-        print(f"✅ Backfill completed. Total records for {symbol}: {len(symbol_records)}")
+    if total:
+        print(f"✅ Backfill completed. Total records for {symbol}: {total}")
     else:
         print(f"⚠️ No data found for {symbol}")
         
@@ -210,7 +309,7 @@ def backfill_batch(symbols, target_days=250):
     Concludes when all symbols reached target_days or max search reached.
     """
     print(f"🚀 Starting batch backfill for {len(symbols)} symbols (target: {target_days} trading days)")
-    existing = load_existing()
+    store = get_store()
     today = date.today()
     
     symbols_set = {s.upper() for s in symbols}
@@ -219,34 +318,33 @@ def backfill_batch(symbols, target_days=250):
     # format: { symbol: count }
     progress = {}
     for s in symbols_set:
-        progress[s] = len([r for r in existing if r["symbol"] == s])
+        progress[s] = store.count(s)
     
     max_search_days = 730
+    window = max(get_downloader().workers * 2, 8)
+    searched = 0
     
-    for i in range(1, max_search_days + 1):
+    for dates in date_windows(today, max_search_days, window):
         # Check if we are done
         undone = [s for s, count in progress.items() if count < target_days]
         if not undone:
             print(f"✅ All {len(symbols)} symbols reached {target_days} days. Batch backfill done.")
             break
-            
-        target_date = today - timedelta(days=i)
+
+        searched += len(dates)
         
-        # We only care about downloading if at least one symbol needs data for this date
-        # (Though ingest_for_date already checks existence, we can be more efficient)
-        if ingest_for_date(target_date, existing, allowed_symbols=symbols_set):
-            # Update progress for all symbols in batch
-            # Actually ingest_for_date updates the 'existing' list
-            # We just need to refresh our counts for symbols that were actually added
-            # For simplicity, we can just re-check the undone list
+        # Only symbols still short of target_days are fetched; dates they
+        # already have are not downloaded
+        if ingest_dates(dates, store, allowed_symbols=set(undone)):
+            # Counts are maintained by the store as rows are appended
             for s in undone:
-                progress[s] = len([r for r in existing if r["symbol"] == s])
+                progress[s] = store.count(s)
             
             completed_now = [s for s in undone if progress[s] >= target_days]
             if completed_now:
                 print(f"  ✨ {len(completed_now)} more symbols reached target (total {len([s for s in progress if progress[s] >= target_days])}/{len(symbols)})")
 
-    print(f"🏁 Batch backfill process finished after searching {i} days.")
+    print(f"🏁 Batch backfill process finished after searching {searched} days.")
     return True
 
 def run_auto_ingest():
@@ -255,19 +353,16 @@ def run_auto_ingest():
     to ensure we have the most recent data.
     """
     print("🚀 Starting auto-ingestion of recent bhavcopy...")
-    existing = load_existing()
+    store = get_store()
     today = date.today()
     
     # Try last 15 days to ensure we catch all missing business days
-    found_any = False
-    for i in range(1, 16):
-        target_date = today - timedelta(days=i)
-        success = ingest_for_date(target_date, existing)
-        if success:
-            found_any = True
-            print(f"✅ Auto-ingest found data for {target_date}")
+    dates = [today - timedelta(days=i) for i in range(1, 16)]
+    found = ingest_dates(dates, store)
+    for target_date in sorted(found):
+        print(f"✅ Auto-ingest found data for {target_date}")
     
-    if not found_any:
+    if not found:
         print("ℹ️ Auto-ingest: No new bhavcopy data found.")
 
 
@@ -0,0 +1,99 @@
+# scripts/trading_calendar.py
+
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+# =====================================================
+# CONFIG
+# =====================================================
+
+CALENDAR_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "bhavcopy_cache", "calendar.json")
+
+# A missing file is only trusted once the date is this old; the latest
+# bhavcopy is published in the evening and can 404 until then
+MISSING_GRACE_DAYS = 3
+
+# NSE equity trading holidays (weekdays with no bhavcopy).
+# Extra dates can be listed under "holidays" in calendar.json.
+NSE_HOLIDAYS = {
+    # 2024
+    "2024-01-22", "2024-01-26", "2024-03-08", "2024-03-25", "2024-03-29",
+    "2024-04-11", "2024-04-17", "2024-05-01", "2024-05-20", "2024-06-17",
+    "2024-07-17", "2024-08-15", "2024-10-02", "2024-11-15", "2024-11-20",
+    "2024-12-25",
+    # 2025
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14",
+    "2025-04-18", "2025-05-01", "2025-08-15", "2025-08-27", "2025-10-02",
+    "2025-10-22", "2025-11-05", "2025-12-25",
+    # 2026
+    "2026-01-15", "2026-01-26", "2026-03-03", "2026-03-26", "2026-03-31",
+    "2026-04-03", "2026-04-14", "2026-05-01", "2026-05-28", "2026-06-26",
+    "2026-09-14", "2026-10-02", "2026-10-20", "2026-11-10", "2026-11-24",
+    "2026-12-25",
+}
+
+
+class TradingCalendar:
+    """
+    Which dates can have a bhavcopy: not a weekend, not a known holiday and
+    not a date already learned to have no file. Learned dates persist.
+    """
+
+    def __init__(self, path=CALENDAR_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.holidays = set(NSE_HOLIDAYS)
+        self.missing = set()
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                self.holidays.update(data.get("holidays", []))
+                self.missing.update(data.get("missing", []))
+            except Exception:
+                print("⚠️ Warning: calendar.json invalid, ignoring learned dates.")
+
+        year = str(date.today().year)
+        if not any(h.startswith(year) for h in self.holidays):
+            print(f"⚠️ Warning: no NSE holidays listed for {year}; add them to NSE_HOLIDAYS "
+                  f"or calendar.json, until then holidays are learned from 404s.")
+
+    def is_trading_day(self, d):
+        if d.weekday() >= 5:
+            return False
+        key = d.isoformat()
+        return key not in self.holidays and key not in self.missing
+
+    def trading_days_back(self, today, count, max_days=730):
+        """Up to `count` candidate trading days before `today`, newest first."""
+        days = []
+        for i in range(1, max_days + 1):
+            d = today - timedelta(days=i)
+            if self.is_trading_day(d):
+                days.append(d)
+                if len(days) >= count:
+                    break
+        return days
+
+    def mark_missing(self, d, today=None):
+        """Remember a date with no file (ignored while it is still recent)."""
+        today = today or date.today()
+        if (today - d).days < MISSING_GRACE_DAYS:
+            return
+        with self.lock:
+            key = d.isoformat()
+            if key in self.missing:
+                return
+            self.missing.add(key)
+            self._save()
+
+    def _save(self):
+        extra = sorted(self.holidays - NSE_HOLIDAYS)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"holidays": extra, "missing": sorted(self.missing)}, f, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,85 @@
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+
+def slice_range(series, start=None, end=None):
+    """Points with start <= time <= end (ISO date strings, series sorted by time)."""
+    if not start and not end:
+        return series
+    times = [p["time"] for p in series]
+    lo = bisect_left(times, start) if start else 0
+    hi = bisect_right(times, end) if end else len(series)
+    return series[lo:hi]
+
+
+def lttb(series, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling to `threshold` points.
+    x is the point index (one bar per trading day), y is the volume.
+    """
+    n = len(series)
+    if threshold >= n or threshold < 3:
+        return list(series)
+
+    sampled = [series[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        count = next_end - next_start
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(series[j]["value"] for j in range(next_start, next_end)) / count
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = a, series[a]["value"]
+
+        best_area = -1
+        best = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (series[j]["value"] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        sampled.append(series[best])
+        a = best
+
+    sampled.append(series[-1])
+    return sampled
+
+
+class SeriesCache:
+    """
+    LRU of sliced/downsampled historical series keyed by
+    (symbol, last ingested date, from, to, max_points).
+    A new ingest changes last_date, so stale entries simply age out.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+        value = build()
+
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return value
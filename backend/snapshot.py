@@ -0,0 +1,81 @@
+import time
+from bisect import bisect_right
+
+import event_log
+
+
+def project_rows(rows, fields=None, symbols=None):
+    """Filter rows to `symbols` and trim each to `fields` ("symbol" is always kept)."""
+    if symbols:
+        rows = [r for r in rows if r["symbol"] in symbols]
+    if fields:
+        keep = set(fields) | {"symbol"}
+        rows = [{k: v for k, v in r.items() if k in keep} for r in rows]
+    return list(rows)
+
+
+class StateSnapshot:
+    """
+    Immutable, versioned view of Storage published by the ingest side.
+    Read endpoints serve from the latest snapshot without taking locks;
+    nothing inside is mutated after publish (each publish builds new rows).
+    """
+    __slots__ = ("version", "cursor", "rows", "row_seq", "removed",
+                 "delta_floor", "logs", "log_seq", "alerts", "created",
+                 "seqs", "seq_symbols", "positions", "removed_seqs")
+
+    def __init__(self, version, cursor, rows, row_seq, removed, delta_floor, logs, log_seq, alerts):
+        self.version = version
+        self.cursor = cursor
+        self.rows = rows                # tuple of row dicts
+        self.row_seq = row_seq          # symbol -> seq of last change, ascending seq order
+        self.removed = removed          # tuple of (seq, symbol) tombstones, ascending seq
+        self.delta_floor = delta_floor
+        self.logs = logs                # tuple of log entries (seq ordered)
+        self.log_seq = log_seq          # seq of the newest log entry
+        self.alerts = alerts            # tuple of alert dicts
+        self.created = time.time()
+
+        # Seq-ordered indexes so a delta read bisects to the changed rows
+        self.seqs = tuple(row_seq.values())
+        self.seq_symbols = tuple(row_seq)
+        self.positions = {r["symbol"]: i for i, r in enumerate(rows)}
+        self.removed_seqs = tuple(seq for seq, _ in removed)
+
+    @classmethod
+    def empty(cls, cursor):
+        return cls(0, cursor, (), {}, (), cursor, (), 0, ())
+
+    def changes(self, since):
+        """
+        Rows changed after cursor `since` (same shape as /data?since=).
+        Falls back to a full snapshot when the cursor is unknown or too old.
+        """
+        if since is None or since < self.delta_floor or since > self.cursor:
+            return {"cursor": self.cursor, "full": True, "rows": list(self.rows), "removed": []}
+
+        # Only rows touched after `since`, returned in table order
+        positions = self.positions
+        changed = sorted(positions[sym] for sym in self.seq_symbols[bisect_right(self.seqs, since):]
+                         if sym in positions)
+        removed = self.removed[bisect_right(self.removed_seqs, since):]
+        return {
+            "cursor": self.cursor,
+            "full": False,
+            "rows": [self.rows[i] for i in changed],
+            "removed": [sym for _, sym in removed if sym not in self.row_seq]
+        }
+
+    def log_changes(self, since=None, symbol=None, kind=None):
+        """
+        Log entries after cursor `since` (same shape as /logs?since=).
+        `truncated` means entries between the cursor and the oldest kept entry were dropped.
+        """
+        if since is not None and since > self.log_seq:
+            since = None   # cursor from before a restart
+        oldest = event_log.oldest_seq(self.logs, self.log_seq)
+        return {
+            "cursor": self.log_seq,
+            "truncated": since is None or since < oldest - 1,
+            "logs": event_log.select(self.logs, since, symbol, kind)
+        }
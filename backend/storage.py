@@ -1,27 +1,85 @@
 from datetime import datetime, time as datetime_time
 import random
+import threading
 import time
+from collections import OrderedDict, deque
+from functools import wraps
+
+from alert_engine import AlertThresholdIndex
+from event_log import EventLog, KIND_ALERT, KIND_STATUS, KIND_STOCK, KIND_SYSTEM
+from minute_bars import MinuteRing, in_session, session_minute
+from snapshot import StateSnapshot
+
+try:
+    from columnar_store import ColumnarStore
+except ImportError:  # NumPy not installed -> plain dict rows
+    ColumnarStore = None
+
+# (setting toggle, row baseline, status label) in display order
+STATUS_BASELINES = (
+    ("above_prev_day", "prev_day", "ABOVE PREV DAY"),
+    ("above_weekly_avg", "weekly_avg", "ABOVE WEEKLY AVG"),
+    ("above_monthly_avg", "monthly_avg", "ABOVE MONTHLY AVG"),
+)
+
+STALE_AFTER_SECONDS = 300
+
+def locked(method):
+    """Run a mutating Storage method under the writer lock."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class Storage:
-    def __init__(self):
+    def __init__(self, columnar=False):
         self.symbols = {}
         self.last_ttq = {}
-        self.symbol_data = {}
+
+        # 🔥 LIVE STATE: dict rows, or NumPy columns behind a dict-compatible view
+        self.columnar = bool(columnar and ColumnarStore is not None)
+        if columnar and not self.columnar:
+            print("⚠️ NumPy not available, falling back to dict-based symbol_data")
+        self.symbol_data = ColumnarStore() if self.columnar else {}
         self.historical_metrics = {} # Added to fix AttributeError
-        self.logs = []
+        self.historical_series = {}  # symbol -> [{"time", "value"}], served only by /historical
+        self.logs = EventLog(capacity=300)
 
         # 🔥 USER-SELECTED TIME RANGE
         self.window_start_time = datetime_time(9, 15)   # Default start
         self.window_end_time = datetime_time(15, 30)     # Default end
 
         # 🕒 MINUTE-LEVEL HISTORY (Built live)
-        # Format: { symbol: [ { "time": datetime, "vol": int }, ... ] }
+        # Format: { symbol: MinuteRing } - one preallocated slot per session minute
         self.volume_history = {}
 
         self.alerts = {}
+        self.alert_index = AlertThresholdIndex()
+        self.status_next = {}   # symbol -> live_volume at which status must be recomputed
+        self.status_floor = {}  # symbol -> live_volume below which status must be recomputed
         self.window_alerted_today = set()
         self._last_day = None
 
+        # 🔁 CHANGE TRACKING (for /data?since=<cursor>)
+        # Sequence starts at wall-clock microseconds so cursors stay monotonic across restarts
+        self.change_seq = time.time_ns() // 1000
+        self.row_seq = OrderedDict()            # symbol -> seq of last change, oldest first
+        self.removed_rows = deque(maxlen=500)   # (seq, symbol) tombstones
+        self.delta_floor = self.change_seq      # cursors older than this get a full snapshot
+
+        # 📡 PUSH: StreamHub for server-sent events (set by app)
+        self.hub = None
+
+        # 📸 SNAPSHOTS: writers hold `lock`, readers use the latest immutable `snapshot`
+        self.lock = threading.RLock()
+        # Serializes build + push so SSE deltas go out in cursor order
+        self.publish_lock = threading.Lock()
+        self.dirty = True
+        self.snapshot_interval = 0.2   # max ~5 publishes per second
+        self._last_publish = 0.0
+        self.snapshot = StateSnapshot.empty(self.change_seq)
+
         # 🔥 ALERT SETTINGS (Toggles)
         # 🔥 ALERT SETTINGS (Toggles)
         self.ALERT_SETTINGS_FILE = "data/alert_settings.json"
@@ -54,53 +112,64 @@ class Storage:
         except Exception as e:
             print(f"⚠️ Error saving alert settings: {e}")
 
+    @locked
     def update_alert_settings(self, new_settings):
         """Update settings and persist to disk"""
         self.alert_settings.update(new_settings)
         self.save_alert_settings()
+        self.alert_index.invalidate()
+        self.touch_all()
+        for symbol in list(self.symbol_data):
+            self.update_status(symbol)
+
+    # ---------------- CHANGE TRACKING ----------------
+
+    def touch(self, symbol):
+        """Mark a row as changed so delta readers pick it up."""
+        self.change_seq += 1
+        self.row_seq[symbol] = self.change_seq
+        self.row_seq.move_to_end(symbol)
+        self.dirty = True
+
+    def touch_all(self):
+        self.change_seq += 1
+        self.row_seq = OrderedDict.fromkeys(self.symbol_data, self.change_seq)
+        self.dirty = True
+
+    def _forget_row(self, symbol):
+        self.row_seq.pop(symbol, None)
+        if len(self.removed_rows) == self.removed_rows.maxlen:
+            # Oldest tombstone is about to drop: older cursors can no longer be served deltas
+            self.delta_floor = self.removed_rows[0][0]
+        self.change_seq += 1
+        self.removed_rows.append((self.change_seq, symbol))
+        self.dirty = True
 
     # ---------------- HISTORY ----------------
 
     def record_volume(self, symbol, volume, timestamp=None):
         if timestamp is None:
             timestamp = datetime.now()
-        
-        # Round to nearest minute for storage
-        dt_minute = timestamp.replace(second=0, microsecond=0)
-        
-        history = self.volume_history.setdefault(symbol, [])
-        
-        # Avoid duplicate entries for same minute (keep latest)
-        if history and history[-1]["time"] == dt_minute:
-            history[-1]["vol"] = volume
-        else:
-            history.append({"time": dt_minute, "vol": volume})
-            
-            # Keep last 400 points (~1 trading day)
-            if len(history) > 400:
-                history.pop(0)
+        # Pre-open and post-close prints have no bar (and must not rewrite 15:29's)
+        if not in_session(timestamp):
+            return
+
+        ring = self.volume_history.get(symbol)
+        if ring is None:
+            ring = self.volume_history[symbol] = MinuteRing()
+
+        # Same minute overwrites its slot (keep latest)
+        ring.record(timestamp.date(), session_minute(timestamp), volume)
 
     def get_volume_at(self, symbol, target_time):
         """
         Find volume at specific time (or closest previous point)
         target_time: datetime.time object
         """
-        history = self.volume_history.get(symbol)
-        if not history:
+        ring = self.volume_history.get(symbol)
+        if ring is None:
             return 0
-            
-        # Create full datetime for comparison
-        target_dt = datetime.combine(datetime.today(), target_time)
-        
-        # Find closest point <= target_dt
-        closest_vol = 0
-        for point in history:
-            if point["time"] <= target_dt:
-                closest_vol = point["vol"]
-            else:
-                break # sorted by time, so we can stop
-                
-        return closest_vol
+        return ring.volume_at(datetime.now().date(), session_minute(target_time))
 
     # ---------------- TIME ----------------
 
@@ -119,9 +188,9 @@ class Storage:
         if not self.window_start_time or not self.window_end_time:
             return None
 
-        start = datetime.combine(datetime.today(), self.window_start_time)
-        end = datetime.combine(datetime.today(), self.window_end_time)
-        return int((end - start).total_seconds() / 60)
+        start = self.window_start_time.hour * 60 + self.window_start_time.minute
+        end = self.window_end_time.hour * 60 + self.window_end_time.minute
+        return end - start
 
     def in_selected_time_window(self):
         """
@@ -133,6 +202,7 @@ class Storage:
         now = datetime.now().time()
         return self.window_start_time <= now <= self.window_end_time
 
+    @locked
     def set_time_range(self, start_str: str, end_str: str):
         """
         Set user-defined time range (HH:MM → HH:MM)
@@ -162,29 +232,41 @@ class Storage:
             row["window_volume"] = max(0, live_vol - start_vol)
             
             row["window_zscore"] = None
+            row["volume_intensity"] = "WAITING"
             row["window_alert_hit"] = False
+            row["is_red_alert"] = bool(row.get("user_alert_hit"))
 
         self.window_alerted_today.clear()
+        self.touch_all()
 
         self.add_log(f"TIME WINDOW SET: {start_str} → {end_str}")
 
     # ---------------- RESET ----------------
 
-    def reset_if_new_day(self):
-        today = datetime.now().date()
+    @locked
+    def reset_if_new_day(self, now=None):
+        today = (now or datetime.now()).date()
         if self._last_day != today:
             self.window_alerted_today.clear()
+            # TTQ is cumulative per session, so the new day starts from zero
+            self.last_ttq.clear()
             for row in self.symbol_data.values():
+                row["live_volume"] = 0
                 row["window_volume"] = 0
                 row["window_alert_hit"] = False
                 row["user_alert_hit"] = False
                 row["is_red_alert"] = False
                 row["window_zscore"] = None
-                row["last_status"] = None
+                row["volume_intensity"] = "WAITING"
             self._last_day = today
+            self.touch_all()
+            # New session: recompute status without logging a transition
+            for symbol in list(self.symbol_data):
+                self.update_status(symbol, log=False)
 
     # ---------------- REGISTRATION ----------------
 
+    @locked
     def register_stock(self, symbol, token, log=True):
         """Register a new stock for monitoring."""
         token_str = str(token)
@@ -204,12 +286,11 @@ class Storage:
                 "window_std": 0,
                 "prev_day": 0,
                 "weekly_avg": 0,
-                "monthly_avg": 0,
-                "historical_series": []
+                "monthly_avg": 0
             }
             # Only log if requested AND it's NOT a stock being loaded with historical metrics
             if log and symbol not in self.historical_metrics:
-                self.add_log(f"Registered {symbol} (token: {token_str})")
+                self.add_log(f"Registered {symbol} (token: {token_str})", symbol=symbol, kind=KIND_STOCK)
         else:
             # Just update the token mapping, don't log again
             self.symbol_data[symbol]["token"] = token_str
@@ -218,12 +299,23 @@ class Storage:
                 "live_volume": 0, "window_volume": 0, "window_zscore": 0, 
                 "volume_intensity": "NORMAL", "user_alert_hit": False,
                 "window_mean": 0, "window_std": 0, "prev_day": 0,
-                "weekly_avg": 0, "monthly_avg": 0, "historical_series": []
+                "weekly_avg": 0, "monthly_avg": 0
             }
             for k, v in defaults.items():
                 if k not in self.symbol_data[symbol]:
                     self.symbol_data[symbol][k] = v
+        self.touch(symbol)
+        self.update_status(symbol, log=False)
     
+    @locked
+    def register_stocks(self, stocks):
+        """Register many {symbol, token} stocks under one lock with a single log line."""
+        for stock in stocks:
+            self.register_stock(stock["symbol"], stock["token"], log=False)
+        if stocks:
+            self.add_log(f"Registered {len(stocks)} stocks", kind=KIND_STOCK)
+
+    @locked
     def remove_stock(self, symbol):
         """Remove a stock from monitoring."""
         # Find and remove from symbols dict
@@ -235,25 +327,50 @@ class Storage:
         
         if token_to_remove:
             del self.symbols[token_to_remove]
-            self.add_log(f"Removed {symbol} from monitoring (token: {token_to_remove})")
+            self.add_log(f"Removed {symbol} from monitoring (token: {token_to_remove})", symbol=symbol, kind=KIND_STOCK)
         
         # Remove from symbol_data
         if symbol in self.symbol_data:
             del self.symbol_data[symbol]
+            self._forget_row(symbol)
         
+        self.volume_history.pop(symbol, None)
+        self.status_next.pop(symbol, None)
+        self.status_floor.pop(symbol, None)
+        self.historical_series.pop(symbol, None)
+
         # Remove from historical metrics
         if symbol in self.historical_metrics: # Note: historical_metrics is not initialized in __init__
             del self.historical_metrics[symbol]
+
+        self.alert_index.invalidate(symbol)
         
         return token_to_remove
 
+    @locked
     def set_historical_metrics(self, symbol, metrics):
         self.historical_metrics[symbol] = metrics # Track for registration suppression
-        self.symbol_data.setdefault(symbol, {}).update(metrics)
+
+        # Keep the (large) series out of the row so /data never carries it
+        row_metrics = {k: v for k, v in metrics.items() if k != "historical_series"}
+        if "historical_series" in metrics:
+            self.historical_series[symbol] = metrics["historical_series"]
+
+        self.symbol_data.setdefault(symbol, {}).update(row_metrics)
+        self.alert_index.invalidate(symbol)
+        self.touch(symbol)
+        self.update_status(symbol)
 
     # ---------------- TICKS ----------------
 
-    def update_tick(self, token, ttq):
+    def update_tick(self, token, ttq, now=None):
+        """
+        Apply a cumulative traded quantity (TTQ) for a token.
+        `now` lets batch callers share one clock read across many ticks.
+        """
+        if now is None:
+            now = datetime.now()
+
         symbol = self.symbols.get(token)
         if not symbol:
             return
@@ -273,32 +390,105 @@ class Storage:
 
         # window_volume ONLY adds delta if we are currently inside the window
         # (This ensures it freezes once the window ends)
-        now = datetime.now().time()
+        now_time = now.time()
         is_inside = True
         if self.window_start_time and self.window_end_time:
-            is_inside = self.window_start_time <= now <= self.window_end_time
+            is_inside = self.window_start_time <= now_time <= self.window_end_time
             
         if is_inside:
             row["window_volume"] += delta
         
         # Track last update time
-        row["last_update"] = time.time()
+        row["last_update"] = now.timestamp()
         row["is_stale"] = False # Any update means it's not stale right now
+        self.touch(symbol)
+
+        # Status only changes when live_volume leaves the [floor, next) band
+        if ttq >= self.status_next.get(symbol, 0) or ttq < self.status_floor.get(symbol, 0):
+            self.update_status(symbol)
+
+    # ---------------- STATUS ----------------
+
+    def _compute_status(self, row):
+        """Relative-level status plus the live_volume band [floor, next) it holds for."""
+        lv = row.get("live_volume", 0)
+        status_parts = []
+        floor_at = 0
+        next_at = float("inf")
+
+        for setting, key, label in STATUS_BASELINES:
+            level = row.get(key)
+            if not self.alert_settings.get(setting) or not level:
+                continue
+            if lv >= level:
+                status_parts.append(label)
+                floor_at = max(floor_at, level)
+            else:
+                next_at = min(next_at, level)
+
+        if row.get("user_alert_hit"):
+            status = "ALERT"
+        elif status_parts:
+            status = " | ".join(status_parts)
+        else:
+            status = "BELOW AVERAGES"
+        return status, floor_at, next_at
+
+    def update_status(self, symbol, log=True):
+        """Recompute a row's status and emit the transition at the moment it happens."""
+        row = self.symbol_data.get(symbol)
+        if row is None:
+            return
+
+        curr, floor_at, next_at = self._compute_status(row)
+        self.status_floor[symbol] = floor_at
+        self.status_next[symbol] = next_at
+
+        prev = row.get("status")
+        if prev == curr:
+            return
+
+        row["status"] = curr
+        row["last_status"] = curr
+        self.touch(symbol)
+
+        if log and prev is not None:
+            self.add_log(f"[{symbol}]: {prev} → {curr}", symbol=symbol, kind=KIND_STATUS)
+
+    def sweep_stale(self):
+        """Flag rows with no tick for 5 mins while the window is open (writer side)."""
+        now_ts = time.time()
+        in_window = self.in_selected_time_window()
+
+        for symbol, row in self.symbol_data.items():
+            last_upd = row.get("last_update") or 0
+            if last_upd <= 0:
+                continue
+            stale = in_window and now_ts - last_upd > STALE_AFTER_SECONDS
+            if row.get("is_stale") != stale:
+                row["is_stale"] = stale
+                self.touch(symbol)
 
     # ---------------- ALERTS ----------------
 
+    @locked
     def add_alert(self, symbol, alert):
         self.alerts.setdefault(symbol, []).append(alert)
+        self.alert_index.invalidate(symbol)
+        self.publish_alerts()
 
     def get_alerts(self, symbol):
         return self.alerts.get(symbol, [])
 
+    @locked
     def remove_alert(self, alert_id):
         for symbol, alerts in self.alerts.items():
             for a in list(alerts):
                 if a.id == alert_id:
                     alerts.remove(a)
-                    self.add_log(f"ALERT REMOVED: {symbol}")
+                    self.alert_index.invalidate(symbol)
+                    self.add_log(f"ALERT REMOVED: {symbol}", symbol=symbol, kind=KIND_ALERT)
+                    self.publish_alerts()
                     
                     # Re-evaluate status immediately
                     row = self.symbol_data.get(symbol)
@@ -306,82 +496,113 @@ class Storage:
                         any_hit = any(alert.triggered for alert in alerts)
                         if not any_hit:
                             row["user_alert_hit"] = False
-                            if row.get("status") == "ALERT":
-                                row["status"] = "BELOW AVERAGES" # Reset to default
+                            row["is_red_alert"] = bool(row.get("window_alert_hit"))
+                            self.touch(symbol)
+                            self.update_status(symbol)
                     return True
         return False
 
+    def get_alerts_payload(self):
+        result = []
+        for symbol, alerts in self.alerts.items():
+            for a in alerts:
+                result.append({
+                    "id": a.id,
+                    "symbol": a.symbol,
+                    "operator": a.operator,
+                    "right_type": a.right_type,
+                    "right_value": a.right_value,
+                    "triggered": a.triggered
+                })
+        return result
+
+    def publish_alerts(self):
+        """Push alert state to streaming clients (no-op without a hub)."""
+        self.dirty = True
+        if self.hub:
+            self.hub.publish("alerts", self.get_alerts_payload())
+
     # ---------------- LOGS ----------------
 
-    def add_log(self, msg):
-        self.logs.append({
-            "time": datetime.now().strftime("%H:%M:%S"),
-            "message": msg
-        })
-        self.logs = self.logs[-300:]
+    @locked
+    def add_log(self, msg, symbol=None, kind=KIND_SYSTEM):
+        entry = self.logs.append(msg, symbol=symbol, kind=kind)
+        self.dirty = True
+
+        if self.hub:
+            self.hub.publish("log", entry)
 
     def get_logs(self):
-        return self.logs
+        return list(self.snapshot.logs)
 
     # ---------------- UI DATA ----------------
 
-    def get_all_volumes(self):
-        rows = []
+    def _snapshot_rows(self):
+        """Plain-dict copy of every row ({"symbol": symbol, **row})."""
+        if self.columnar:
+            return self.symbol_data.records()
+        return [{"symbol": symbol, **row} for symbol, row in self.symbol_data.items()]
 
-        for symbol, row in self.symbol_data.items():
-            # Staleness check on read
-            last_upd = row.get("last_update", 0)
-            if last_upd > 0:
-                time_since_last = time.time() - last_upd
-                # Only flag as stale if market is open and no update for 5 mins
-                if time_since_last > 300 and self.in_selected_time_window():
-                    row["is_stale"] = True
-                else:
-                    row["is_stale"] = False
-
-            lv = row.get("live_volume", 0)
-
-            # ================= STATUS (RELATIVE LEVELS) =================
-            status_parts = []
-
-            if self.alert_settings.get("above_prev_day") and row.get("prev_day") and lv >= row["prev_day"]:
-                status_parts.append("ABOVE PREV DAY")
-
-            if self.alert_settings.get("above_weekly_avg") and row.get("weekly_avg") and lv >= row["weekly_avg"]:
-                status_parts.append("ABOVE WEEKLY AVG")
-
-            if self.alert_settings.get("above_monthly_avg") and row.get("monthly_avg") and lv >= row["monthly_avg"]:
-                status_parts.append("ABOVE MONTHLY AVG")
-
-            if row.get("user_alert_hit"):
-                row["status"] = "ALERT"
-            elif status_parts:
-                row["status"] = " | ".join(status_parts)
-            else:
-                row["status"] = "BELOW AVERAGES"
-
-            prev = row.get("last_status")
-            curr = row["status"]
-
-            if prev is not None and prev != curr:
-                self.add_log(f"[{symbol}]: {prev} → {curr}")
-
-            row["last_status"] = curr
-
-            # ================= VOLUME MOVEMENT =================
-            z = row.get("window_zscore")
-
-            if z is None:
-                row["volume_intensity"] = "WAITING"
-            elif z < 1:
-                row["volume_intensity"] = "NORMAL"
-            elif z < 2:
-                row["volume_intensity"] = "HIGH"
-
-            row["is_red_alert"] = bool(
-                row.get("window_alert_hit") or row.get("user_alert_hit")
-            )
+    def get_all_volumes(self):
+        """Pure read: status, intensity and staleness are maintained on the write path."""
+        return self._snapshot_rows()
 
-            rows.append({"symbol": symbol, **row})
+    # ---------------- SNAPSHOTS ----------------
 
-        return rows
\ No newline at end of file
+    def publish_snapshot(self, force=False):
+        """
+        Build and swap in a new immutable snapshot (ingest side only).
+        Rate limited to one publish per `snapshot_interval` unless forced.
+        """
+        now = time.monotonic()
+        if not force and (not self.dirty or now - self._last_publish < self.snapshot_interval):
+            return self.snapshot
+
+        with self.publish_lock:
+            with self.lock:
+                self.dirty = False
+                rows = tuple(self.get_all_volumes())
+                prev = self.snapshot
+                snap = StateSnapshot(
+                    version=prev.version + 1,
+                    cursor=self.change_seq,
+                    rows=rows,
+                    row_seq=dict(self.row_seq),
+                    removed=tuple(self.removed_rows),
+                    delta_floor=self.delta_floor,
+                    logs=tuple(self.logs),
+                    log_seq=self.logs.seq,
+                    alerts=tuple(self.get_alerts_payload())
+                )
+                self.snapshot = snap
+                self._last_publish = now
+
+            # Push the delta between consecutive snapshots to streaming clients.
+            # Still under publish_lock (but not the writer lock), so two publishers
+            # can't deliver an older delta after a newer one.
+            if self.hub and self.hub.has_clients() and snap.cursor != prev.cursor:
+                self.hub.publish("rows", snap.changes(prev.cursor))
+
+        return snap
+
+    def start_snapshot_publisher(self):
+        """Background publisher so idle-period changes (logs, API edits) still go out."""
+        def loop():
+            last_sweep = 0.0
+            while True:
+                time.sleep(self.snapshot_interval)
+                try:
+                    # Staleness is time-driven, so it can't wait for a tick
+                    if time.monotonic() - last_sweep >= 5:
+                        with self.lock:
+                            self.sweep_stale()
+                        last_sweep = time.monotonic()
+                    self.publish_snapshot()
+                except Exception as e:
+                    print(f"Error publishing snapshot: {e}")
+
+        threading.Thread(target=loop, daemon=True).start()
+
+    def get_changes(self, since):
+        """Rows changed after cursor `since`, served from the latest snapshot."""
+        return self.snapshot.changes(since)
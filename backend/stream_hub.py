@@ -0,0 +1,55 @@
+import json
+import queue
+import threading
+
+# Sentinel pushed to a client whose queue overflowed: it gets a fresh snapshot instead
+RESYNC = object()
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamHub:
+    """
+    Fan-out for server-sent events.
+    Every client owns a bounded queue; a slow client only loses its own backlog
+    (and is resynced), it never blocks publishers or other clients.
+    """
+
+    def __init__(self, max_queue=256):
+        self.max_queue = max_queue
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.clients.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.clients.discard(q)
+
+    def has_clients(self):
+        return bool(self.clients)
+
+    def publish(self, event, data):
+        if not self.clients:
+            return
+
+        # Serialize once for all clients
+        message = format_sse(event, data)
+
+        with self.lock:
+            clients = list(self.clients)
+
+        for q in clients:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Drop this client's backlog and ask it to resync from a snapshot
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(RESYNC)
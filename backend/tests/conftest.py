@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import backend modules the way app.py does (backend/ on sys.path)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
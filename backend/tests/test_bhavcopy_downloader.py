@@ -0,0 +1,157 @@
+import io
+import threading
+import zipfile
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scripts.bhavcopy_cache import BhavcopyCache
+from scripts.bhavcopy_downloader import BhavcopyDownloader, bhavcopy_name
+from scripts.ingest_bhavcopy import parse_eq_rows
+from scripts.trading_calendar import TradingCalendar
+
+FOUND = date(2025, 6, 2)
+MISSING = date(2025, 6, 3)
+THROTTLED_ONCE = date(2025, 6, 4)
+THROTTLED = date(2025, 6, 5)
+
+
+def fixture_zip(day, rows):
+    """Bhavcopy-shaped zip: one CSV with the columns the ingest reads."""
+    lines = ["TradDt,TckrSymb,SctySrs,TtlTradgVol"]
+    lines += [f"{day.isoformat()},{sym},{series},{vol}" for sym, series, vol in rows]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr(bhavcopy_name(day)[:-4], "\n".join(lines) + "\n")
+    return buf.getvalue()
+
+
+class FixtureServer:
+    """
+    Stand-in for the NSE archive. `routes` maps file name -> list of
+    responses (status, content_type, body); the last one repeats.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.hits = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                name = self.path.rsplit("/", 1)[-1]
+                n = server.hits.get(name, 0)
+                server.hits[name] = n + 1
+                responses = server.routes.get(name, [(404, "text/html", b"<html>Not Found</html>")])
+                status, ctype, body = responses[min(n, len(responses) - 1)]
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/content/cm/"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+ZIP = "application/zip"
+THROTTLE = (429, "text/plain", b"slow down")
+
+
+@pytest.fixture
+def routes():
+    return {
+        bhavcopy_name(FOUND): [(200, ZIP, fixture_zip(FOUND, [("TCS", "EQ", 1200), ("TCS", "BE", 5)]))],
+        bhavcopy_name(THROTTLED_ONCE): [THROTTLE, (200, ZIP, fixture_zip(THROTTLED_ONCE, [("INFY", "EQ", 900)]))],
+        bhavcopy_name(THROTTLED): [THROTTLE],
+    }
+
+
+def make_downloader(url, tmp_path):
+    return BhavcopyDownloader(
+        base_url=url, workers=4, rate=0, retries=2, backoff=0, timeout=5,
+        cache=BhavcopyCache(str(tmp_path / "cache")),
+        calendar=TradingCalendar(str(tmp_path / "cache" / "calendar.json")),
+    )
+
+
+def test_fetch_many_counts_and_cache(routes, tmp_path):
+    with FixtureServer(routes) as server:
+        dl = make_downloader(server.url, tmp_path)
+        got = dict(dl.fetch_many([FOUND, MISSING, THROTTLED_ONCE, THROTTLED]))
+        dl.close()
+
+    assert got[MISSING] is None
+    assert got[THROTTLED] is None
+    assert parse_eq_rows(got[FOUND]) == (FOUND.isoformat(), {"TCS": 1200})
+    assert parse_eq_rows(got[THROTTLED_ONCE]) == (THROTTLED_ONCE.isoformat(), {"INFY": 900})
+
+    assert dl.stats["found"] == 2
+    assert dl.stats["missing"] == 1
+    assert dl.stats["failed"] == 1
+    # one retry for the 429 that recovered, two for the one that never did
+    assert dl.stats["retries"] == 3
+    assert server.hits[bhavcopy_name(THROTTLED)] == 3
+
+    # Only real zips are cached; only the 404 is learned as a non-trading day
+    assert dl.cache.has(FOUND) and dl.cache.has(THROTTLED_ONCE)
+    assert not dl.cache.has(MISSING) and not dl.cache.has(THROTTLED)
+    assert dl.calendar.missing == {MISSING.isoformat()}
+
+
+def test_second_run_is_served_locally(routes, tmp_path):
+    with FixtureServer(routes) as server:
+        first = make_downloader(server.url, tmp_path)
+        list(first.fetch_many([FOUND, MISSING]))
+        first.close()
+        hits = dict(server.hits)
+
+        dl = make_downloader(server.url, tmp_path)
+        got = dict(dl.fetch_many([FOUND, MISSING]))
+
+    assert server.hits == hits
+    assert dl.stats["requests"] == 0
+    assert dl.stats["cached"] == 1 and dl.stats["skipped"] == 1
+    assert got[MISSING] is None
+    assert parse_eq_rows(got[FOUND])[1] == {"TCS": 1200}
+
+
+BLOCKED = date(2025, 6, 9)
+CHALLENGE = date(2025, 6, 10)
+UNBLOCKED = date(2025, 6, 11)
+
+
+def test_blocks_are_retried_and_never_learned(tmp_path):
+    routes = {
+        bhavcopy_name(BLOCKED): [(403, "text/html", b"<html>Access Denied</html>")],
+        bhavcopy_name(CHALLENGE): [(200, "text/html", b"<html>checking your browser</html>")],
+        bhavcopy_name(UNBLOCKED): [(403, "text/html", b"denied"),
+                                   (200, ZIP, fixture_zip(UNBLOCKED, [("TCS", "EQ", 7)]))],
+    }
+    with FixtureServer(routes) as server:
+        dl = make_downloader(server.url, tmp_path)
+        got = dict(dl.fetch_many([BLOCKED, CHALLENGE, UNBLOCKED]))
+
+    assert got[BLOCKED] is None and got[CHALLENGE] is None
+    assert parse_eq_rows(got[UNBLOCKED])[1] == {"TCS": 7}
+    assert dl.stats["failed"] == 2 and dl.stats["missing"] == 0
+    assert server.hits[bhavcopy_name(BLOCKED)] == 3
+    assert server.hits[bhavcopy_name(CHALLENGE)] == 3
+
+    # A block says nothing about the date: nothing learned, nothing cached
+    assert dl.calendar.missing == set()
+    assert not dl.cache.has(BLOCKED) and not dl.cache.has(CHALLENGE)
+    assert dl.calendar.is_trading_day(BLOCKED)
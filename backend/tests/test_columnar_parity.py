@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+
+from marketdata_handler import MarketDataHandler
+from storage import Storage
+
+pytest.importorskip("numpy")
+
+NOW = datetime(2026, 3, 2, 11, 0)
+
+METRICS = {
+    "prev_day": 1_200_000,
+    "weekly_avg": 1_000_000,
+    "monthly_avg": 900_000,
+    "window_mean": 400_000.0,
+    "window_std": 50_000.0,
+    "available_days": 30,
+}
+
+
+def build(columnar):
+    s = Storage(columnar=columnar)
+    s._last_day = NOW.date()
+    # Metrics first (as at startup), then registration; plus a brand new stock
+    s.set_historical_metrics("TCS", dict(METRICS))
+    s.register_stock("TCS", "11536", log=False)
+    s.register_stock("INFY", "1594", log=False)
+    s.set_historical_metrics("SBIN", dict(METRICS))
+    return s
+
+
+def rows(s):
+    # last_update is the wall clock of each run's own ticks
+    return {r["symbol"]: {k: v for k, v in r.items() if k != "last_update"}
+            for r in s.get_all_volumes()}
+
+
+def test_rows_match_dict_mode():
+    plain, col = build(False), build(True)
+    assert col.columnar
+    assert rows(col) == rows(plain)
+
+    # The registration defaults exist in columnar mode too
+    assert col.symbol_data["TCS"]["volume_intensity"] == "NORMAL"
+    assert col.symbol_data["TCS"]["window_zscore"] == 0
+    # ...and keys that were never set are absent, as with a dict
+    assert "last_update" not in col.symbol_data["INFY"]
+    assert col.symbol_data["INFY"].get("last_update", "unset") == "unset"
+    assert set(col.symbol_data["SBIN"]) == set(plain.symbol_data["SBIN"]) | {"symbol"}
+
+    # Ticks through the batch pipeline: the columnar side takes the vectorized z-score path
+    for s in (plain, col):
+        MarketDataHandler(s).process_batch([("11536", 1_500_000), ("1594", 20_000)])
+    assert rows(col) == rows(plain)
+    assert rows(col)["TCS"]["window_zscore"] is not None
+
+
+def test_removed_row_slot_is_reused_clean():
+    s = build(True)
+    s.update_tick("11536", 1_500_000, now=NOW)
+    s.remove_stock("TCS")
+    s.register_stock("WIPRO", "3787", log=False)
+    assert "last_update" not in s.symbol_data["WIPRO"]
+    assert rows(s)["WIPRO"] == rows(_fresh_plain("WIPRO", "3787"))["WIPRO"]
+
+
+def _fresh_plain(symbol, token):
+    s = Storage(columnar=False)
+    s.register_stock(symbol, token, log=False)
+    return s
@@ -0,0 +1,21 @@
+from datetime import datetime, time
+
+from storage import Storage
+
+
+def test_ticks_outside_session_are_dropped():
+    s = Storage()
+    day = datetime(2026, 3, 2)
+    s.record_volume("TCS", 100, day.replace(hour=9, minute=5))     # pre-open
+    s.record_volume("TCS", 500, day.replace(hour=9, minute=15))
+    s.record_volume("TCS", 900, day.replace(hour=15, minute=29))
+    s.record_volume("TCS", 999, day.replace(hour=15, minute=40))   # post-close
+
+    ring = s.volume_history["TCS"]
+    assert ring.volume_at(day.date(), 0) == 500
+    assert ring.volume_at(day.date(), 374) == 900
+    assert ring.last == 374
+
+    s.record_volume("INFY", 50, day.replace(hour=16))
+    assert "INFY" not in s.volume_history
+    assert s.get_volume_at("INFY", time(15, 0)) == 0
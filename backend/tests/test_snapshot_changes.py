@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from storage import Storage
+
+NOW = datetime(2026, 3, 2, 11, 0)
+
+
+def brute_force(snap, since):
+    """Reference delta: scan every row (what changes() used to do)."""
+    return {
+        "rows": [r for r in snap.rows if snap.row_seq.get(r["symbol"], 0) > since],
+        "removed": [sym for seq, sym in snap.removed if seq > since and sym not in snap.row_seq],
+    }
+
+
+def test_delta_matches_full_scan():
+    s = Storage()
+    s._last_day = NOW.date()
+    for i in range(20):
+        s.register_stock(f"S{i}", str(1000 + i), log=False)
+    first = s.publish_snapshot(force=True)
+
+    for i in (3, 17, 5):
+        s.update_tick(str(1000 + i), 1_000_000 + i, NOW)
+    s.remove_stock("S9")
+    s.update_tick("1003", 2_000_000, NOW)
+    snap = s.publish_snapshot(force=True)
+
+    for since in sorted(set(snap.row_seq.values()) | {first.cursor, snap.delta_floor}):
+        delta = snap.changes(since)
+        assert not delta["full"]
+        assert {k: delta[k] for k in ("rows", "removed")} == brute_force(snap, since)
+
+    delta = snap.changes(first.cursor)
+    assert [r["symbol"] for r in delta["rows"]] == ["S3", "S5", "S17"]
+    assert delta["removed"] == ["S9"]
+    assert snap.changes(snap.cursor)["rows"] == []
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage import Storage
+
+DAY1 = datetime(2026, 3, 2, 11, 0)
+DAY2 = DAY1 + timedelta(days=1)
+
+METRICS = {
+    "prev_day": 1_200_000,
+    "weekly_avg": 1_000_000,
+    "monthly_avg": 900_000,
+    "window_mean": 400_000.0,
+    "window_std": 50_000.0,
+    "available_days": 30,
+}
+
+
+@pytest.fixture(params=[False, True], ids=["dict", "columnar"])
+def storage(request):
+    if request.param:
+        pytest.importorskip("numpy")
+    s = Storage(columnar=request.param)
+    s.reset_if_new_day(DAY1)
+    s.set_historical_metrics("TCS", dict(METRICS))
+    s.register_stock("TCS", "11536", log=False)
+    return s
+
+
+def test_rollover_resets_volume_and_status(storage):
+    storage.update_tick("11536", 100_000_000, DAY1)
+    row = storage.symbol_data["TCS"]
+    assert row["status"] == "ABOVE PREV DAY | ABOVE WEEKLY AVG | ABOVE MONTHLY AVG"
+
+    storage.reset_if_new_day(DAY2)
+    assert row["live_volume"] == 0
+    assert row["window_volume"] == 0
+    assert row["status"] == "BELOW AVERAGES"
+
+    storage.update_tick("11536", 1_000, DAY2)
+    assert row["status"] == "BELOW AVERAGES"
+    assert row["window_volume"] == 1_000
+
+    storage.update_tick("11536", 950_000, DAY2)
+    assert row["status"] == "ABOVE MONTHLY AVG"
+
+
+def test_falling_volume_recomputes_status(storage):
+    storage.update_tick("11536", 1_100_000, DAY1)
+    row = storage.symbol_data["TCS"]
+    assert row["status"] == "ABOVE WEEKLY AVG | ABOVE MONTHLY AVG"
+
+    # A corrected (lower) TTQ drops back below the weekly baseline
+    storage.update_tick("11536", 950_000, DAY1)
+    assert row["status"] == "ABOVE MONTHLY AVG"
@@ -1,5 +1,7 @@
 import os
 import json
+import difflib
+from bisect import bisect_left
 
 # Path to the cached JSON file
 SYMBOLS_CACHE_PATH = os.path.join(os.path.dirname(__file__), "data", "all_symbols.json")
@@ -31,27 +33,121 @@ def get_all_symbols():
         print(f"Error reading symbols cache: {e}")
         return []
 
+# Fuzzy matching only kicks in when the plain search finds fewer than this
+FUZZY_MIN_RESULTS = 5
+FUZZY_MAX_RESULTS = 10
+FUZZY_CUTOFF = 0.75
+
+class SymbolIndex:
+    """
+    Lookup structures built once over all_symbols.json:
+      exact     SYMBOL -> item (O(1) token lookup)
+      keys      sorted symbols, bisected for type-ahead prefixes
+      names     sorted (NAME, SYMBOL) pairs, bisected for name prefixes
+    Fuzzy matching (difflib) runs over symbols and names only when needed.
+    """
+
+    def __init__(self, items):
+        self.exact = {}
+        for item in items:
+            self.exact.setdefault(item.get("symbol", "").strip().upper(), item)
+        self.keys = sorted(self.exact)
+        self.names = sorted(
+            (str(item.get("name") or "").strip().upper(), sym)
+            for sym, item in self.exact.items()
+        )
+        self.name_to_symbol = {name: sym for name, sym in self.names if name}
+
+    def symbol_prefix(self, prefix):
+        out = []
+        for sym in self.keys[bisect_left(self.keys, prefix):]:
+            if not sym.startswith(prefix):
+                break
+            out.append(sym)
+        return out
+
+    def name_prefix(self, prefix):
+        out = []
+        for name, sym in self.names[bisect_left(self.names, (prefix, "")):]:
+            if not name.startswith(prefix):
+                break
+            out.append(sym)
+        return out
+
+    def search(self, query, fuzzy=False):
+        """
+        Symbols matching `query`, best first: exact, symbol prefix, name prefix,
+        then substring of symbol/name, then (optionally) close fuzzy matches.
+        """
+        q = query.strip().upper()
+        if not q:
+            return list(self.keys)
+
+        ranked = []
+        seen = set()
+
+        def add(symbols):
+            for sym in symbols:
+                if sym not in seen:
+                    seen.add(sym)
+                    ranked.append(sym)
+
+        if q in self.exact:
+            add([q])
+        add(self.symbol_prefix(q))
+        add(self.name_prefix(q))
+        add(sym for sym in self.keys if q in sym)
+        add(sym for name, sym in self.names if q in name)
+
+        if fuzzy and len(ranked) < FUZZY_MIN_RESULTS:
+            add(difflib.get_close_matches(q, self.keys, n=FUZZY_MAX_RESULTS, cutoff=FUZZY_CUTOFF))
+            close = difflib.get_close_matches(q, self.name_to_symbol, n=FUZZY_MAX_RESULTS, cutoff=FUZZY_CUTOFF)
+            add(self.name_to_symbol[n] for n in close)
+
+        return ranked
+
+
+_symbol_index = None
+
+def get_index():
+    """The SymbolIndex, built on first use from the cached symbols."""
+    global _symbol_index
+    if _symbol_index is None or not _symbol_index.exact:
+        _symbol_index = SymbolIndex(get_all_symbols())
+    return _symbol_index
+
+def search_symbols(query="", limit=50, offset=0, fuzzy=False):
+    """(total matches, page of {symbol, name, token}) for type-ahead / browsing."""
+    index = get_index()
+    matches = index.search(query, fuzzy=fuzzy)
+    page = [index.exact[s] for s in matches[offset:offset + limit]]
+    return len(matches), page
+
+def _details(item):
+    return {
+        "symbol": item["symbol"],
+        "token": item["token"],
+        "exchange": "NSECM",
+        "series": "EQ"
+    }
+
 def get_token_details(target_symbol):
     """
-    Searches the cached JSON for the given symbol and returns its details.
+    Looks up the given symbol in the cached JSON and returns its details.
     Returns None if not found or file missing.
     """
-    target_symbol = target_symbol.strip().upper()
-    
-    symbols = get_all_symbols()
-    if not symbols:
-        return None
-        
-    for item in symbols:
-        if item.get("symbol", "").strip().upper() == target_symbol:
-            return {
-                "symbol": item["symbol"],
-                "token": item["token"],
-                "exchange": "NSECM",
-                "series": "EQ"
-            }
-            
-    return None
+    item = get_index().exact.get(target_symbol.strip().upper())
+    return _details(item) if item else None
+
+def resolve_many(target_symbols):
+    """{symbol: details or None} for many symbols in one pass over the index."""
+    index = get_index().exact
+    resolved = {}
+    for s in target_symbols:
+        key = s.strip().upper()
+        item = index.get(key)
+        resolved[key] = _details(item) if item else None
+    return resolved
 
 if __name__ == "__main__":
     # Test
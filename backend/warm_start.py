@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "warm_start.pickle")
+
+# Bump when the snapshot layout or the metric formulas change
+FORMAT_VERSION = 1
+
+# Files whose contents feed the snapshot
+SOURCE_FILES = [os.path.join(DATA_DIR, "contracts_nsefo.json")]
+
+
+# ---------------- TIMING ----------------
+
+class StartupTimer:
+    """Wall time per startup phase, printed once and served by /startup-report."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.mode = "cold"
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - t0) * 1000))
+
+    def report(self):
+        return {
+            "mode": self.mode,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "phases": [{"phase": n, "ms": round(ms, 1)} for n, ms in self.phases],
+        }
+
+    def print_report(self):
+        r = self.report()
+        print(f"⏱️ Startup ({r['mode']}) ready in {r['total_ms']} ms")
+        for p in r["phases"]:
+            print(f"   {p['phase']:<24} {p['ms']:>8.1f} ms")
+
+
+# ---------------- SNAPSHOT ----------------
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint_files(paths):
+    out = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            out[path] = None
+            continue
+        out[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": _sha256(path)}
+    return out
+
+
+def _files_valid(saved):
+    """mtime+size match is trusted as is; otherwise the content hash decides."""
+    for path, meta in saved.items():
+        try:
+            st = os.stat(path)
+        except OSError:
+            if meta is not None:
+                return False
+            continue
+        if meta is None or st.st_size != meta["size"]:
+            return False
+        if st.st_mtime_ns != meta["mtime_ns"] and _sha256(path) != meta["sha256"]:
+            return False
+    return True
+
+
+def history_fingerprint(store):
+    """Cheap identity of the history store: row count and newest date."""
+    return {"rows": sum(store.counts.values()), "max_date": store.max_date()}
+
+
+def load_snapshot(store, path=SNAPSHOT_PATH):
+    """The snapshot dict if it matches the current sources and history, else None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snap = pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Warm-start snapshot unreadable, cold start: {e}")
+        return None
+
+    if snap.get("format") != FORMAT_VERSION:
+        return None
+    if not _files_valid(snap.get("files", {})):
+        return None
+    if snap.get("history") != history_fingerprint(store):
+        return None
+    return snap
+
+
+def save_snapshot(store, metrics, last_market_date, stocks, path=SNAPSHOT_PATH, history=None):
+    """
+    Write the snapshot atomically (run after the server is up).
+    `history` is the store fingerprint taken together with `metrics`.
+    """
+    snap = {
+        "format": FORMAT_VERSION,
+        "created": time.time(),
+        "files": fingerprint_files(SOURCE_FILES),
+        "history": history or history_fingerprint(store),
+        "metrics": metrics,
+        "last_market_date": last_market_date,
+        "stocks": stocks,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return snap
+
+
+# ---------------- DEFERRED WORK ----------------
+
+class DeferredTasks:
+    """Non-critical startup work, run in order on one thread once the server is starting."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def add(self, name, fn):
+        self.tasks.append((name, fn))
+
+    def run(self, timer=None):
+        def worker():
+            for name, fn in self.tasks:
+                t0 = time.perf_counter()
+                try:
+                    fn()
+                except Exception as e:
+                    print(f"⚠️ Deferred task {name} failed: {e}")
+                if timer is not None:
+                    timer.phases.append((f"deferred: {name}", (time.perf_counter() - t0) * 1000))
+        threading.Thread(target=worker, daemon=True).start()
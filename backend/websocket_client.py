@@ -7,6 +7,9 @@ from websocket import WebSocketApp
 
 from config import WS_URL, LOGIN_ID, PASSWORD, HEARTBEAT_INTERVAL
 
+# Quotes per TokenRequest when subscribing many tokens
+SUBSCRIBE_BATCH = 100
+
 
 class MTWebSocketClient:
     def __init__(self, market_handler):
@@ -78,32 +81,49 @@ class MTWebSocketClient:
         })
 
 
+    def add_subscriptions(self, stocks):
+        """
+        Add many {token, exchange, symbol} subscriptions at once.
+        When already logged in they are sent right away in batched requests.
+        """
+        new = [{
+            "token": str(s["token"]),
+            "exchange": s["exchange"],
+            "symbol": s["symbol"]
+        } for s in stocks]
+        self.subscriptions_list.extend(new)
+        if self.is_connected and self.ws:
+            self.subscribe_many(new)
+
+
     def subscribe(self, token, exchange, symbol):
-        payload = {
-            "Type": "TokenRequest",
-            "Data": {
-                "SubType": True,
-                "FeedType": 1,  # MarketData
-                "quotes": [
-                    {
-                        "Xchg": exchange,
-                        "Tkn": token,
-                        "Symbol": symbol
-                    }
-                ]
-            }
-        }
-        self.ws.send(json.dumps(payload))
+        self.subscribe_many([{"token": token, "exchange": exchange, "symbol": symbol}])
         # print(f"Subscribed to {symbol}")
 
 
+    def subscribe_many(self, stocks):
+        """One TokenRequest per SUBSCRIBE_BATCH quotes instead of one per token."""
+        for i in range(0, len(stocks), SUBSCRIBE_BATCH):
+            payload = {
+                "Type": "TokenRequest",
+                "Data": {
+                    "SubType": True,
+                    "FeedType": 1,  # MarketData
+                    "quotes": [
+                        {
+                            "Xchg": stock["exchange"],
+                            "Tkn": stock["token"],
+                            "Symbol": stock["symbol"]
+                        }
+                        for stock in stocks[i:i + SUBSCRIBE_BATCH]
+                    ]
+                }
+            }
+            self.ws.send(json.dumps(payload))
+
+
     def subscribe_all(self):
-        for stock in self.subscriptions_list:
-            self.subscribe(
-                stock["token"],
-                stock["exchange"],
-                stock["symbol"]
-            )
+        self.subscribe_many(self.subscriptions_list)
 
     def attempt_reconnect(self):
         """Attempt to reconnect with exponential backoff."""
@@ -0,0 +1,230 @@
+import gzip
+import json
+import math
+import struct
+import zlib
+from array import array
+
+# Optional accelerators: used when installed, stdlib otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MIME_JSON = "application/json"
+MIME_COLUMNAR = "application/vnd.volalert.columnar"
+MIME_MSGPACK = "application/x-msgpack"
+
+COLUMNAR_MAGIC = b"VAC1"
+
+
+def available_formats():
+    """Formats /data can negotiate, JSON first so it stays the default."""
+    formats = [MIME_JSON, MIME_COLUMNAR]
+    if msgpack is not None:
+        formats.append(MIME_MSGPACK)
+    return formats
+
+
+# ---------------- JSON ----------------
+
+def dumps_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+# ---------------- COLUMNAR ----------------
+
+def to_columns(rows):
+    """Row dicts -> (symbols, {field: [values]}); nested lists/dicts are left out."""
+    symbols = [r["symbol"] for r in rows]
+    names = []
+    seen = set()
+    for r in rows:
+        for k in r:
+            if k != "symbol" and k not in seen:
+                seen.add(k)
+                names.append(k)
+
+    columns = {}
+    for name in names:
+        values = [r.get(name) for r in rows]
+        if any(isinstance(v, (list, dict)) for v in values):
+            continue
+        columns[name] = values
+    return symbols, columns
+
+
+def _column_type(values):
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return "?"
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return "q"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "d"
+    return "s"
+
+
+def _pack_strings(values):
+    """Dictionary-encode strings: (vocab, int32 codes with -1 for None)."""
+    vocab = {}
+    codes = array("i")
+    for v in values:
+        if v is None:
+            codes.append(-1)
+            continue
+        v = str(v)
+        code = vocab.get(v)
+        if code is None:
+            code = vocab[v] = len(vocab)
+        codes.append(code)
+    return list(vocab), codes
+
+
+def _pack_vocab(vocab):
+    out = [struct.pack("<I", len(vocab))]
+    for s in vocab:
+        b = s.encode()
+        out.append(struct.pack("<H", len(b)))
+        out.append(b)
+    return b"".join(out)
+
+
+def _native(arr):
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def encode_columnar(rows, meta=None):
+    """
+    Compact column-oriented binary layout (little endian):
+      magic "VAC1" | u32 meta_len | meta JSON | u32 nrows | u16 ncols
+      symbol dictionary (u32 count, then u16 len + utf8 each)
+      per column: u8 name_len, name, u8 type, payload
+        q: int64[nrows]   d: float64[nrows] (NaN = null)   ?: uint8[nrows] (255 = null)
+        s: string dictionary + int32[nrows] codes (-1 = null)
+    """
+    symbols, columns = to_columns(rows)
+    meta_bytes = dumps_json(meta or {})
+
+    out = [COLUMNAR_MAGIC, struct.pack("<I", len(meta_bytes)), meta_bytes,
+           struct.pack("<IH", len(symbols), len(columns)), _pack_vocab(symbols)]
+
+    for name, values in columns.items():
+        kind = _column_type(values)
+        name_bytes = name.encode()
+        out.append(struct.pack("<B", len(name_bytes)))
+        out.append(name_bytes)
+        out.append(kind.encode())
+        if kind == "q":
+            out.append(_native(array("q", values)))
+        elif kind == "d":
+            out.append(_native(array("d", [math.nan if v is None else v for v in values])))
+        elif kind == "?":
+            out.append(bytes(255 if v is None else int(v) for v in values))
+        else:
+            vocab, codes = _pack_strings(values)
+            out.append(_pack_vocab(vocab))
+            out.append(_native(codes))
+    return b"".join(out)
+
+
+def decode_columnar(data):
+    """Inverse of encode_columnar -> (meta, rows). For internal consumers and debugging."""
+    if data[:4] != COLUMNAR_MAGIC:
+        raise ValueError("not a VAC1 payload")
+    pos = 4
+
+    def read(fmt):
+        nonlocal pos
+        values = struct.unpack_from(fmt, data, pos)
+        pos += struct.calcsize(fmt)
+        return values
+
+    def read_vocab():
+        nonlocal pos
+        (count,) = read("<I")
+        vocab = []
+        for _ in range(count):
+            (n,) = read("<H")
+            vocab.append(data[pos:pos + n].decode())
+            pos += n
+        return vocab
+
+    def read_array(typecode, n):
+        nonlocal pos
+        arr = array(typecode)
+        arr.frombytes(data[pos:pos + n * arr.itemsize])
+        pos += n * arr.itemsize
+        if struct.pack("=H", 1) != struct.pack("<H", 1):
+            arr.byteswap()
+        return arr
+
+    (meta_len,) = read("<I")
+    meta = json.loads(data[pos:pos + meta_len])
+    pos += meta_len
+    nrows, ncols = read("<IH")
+    symbols = read_vocab()
+    rows = [{"symbol": s} for s in symbols]
+
+    for _ in range(ncols):
+        (name_len,) = read("<B")
+        name = data[pos:pos + name_len].decode()
+        pos += name_len
+        kind = chr(data[pos])
+        pos += 1
+        if kind == "q":
+            values = read_array("q", nrows).tolist()
+        elif kind == "d":
+            values = [None if v != v else v for v in read_array("d", nrows)]
+        elif kind == "?":
+            raw = data[pos:pos + nrows]
+            pos += nrows
+            values = [None if b == 255 else bool(b) for b in raw]
+        else:
+            vocab = read_vocab()
+            values = [None if c < 0 else vocab[c] for c in read_array("i", nrows)]
+        for row, v in zip(rows, values):
+            row[name] = v
+    return meta, rows
+
+
+def encode_msgpack(rows, meta=None):
+    symbols, columns = to_columns(rows)
+    return msgpack.packb({"meta": meta or {}, "symbols": symbols, "columns": columns})
+
+
+def encode(payload, mimetype):
+    """
+    Serialize a payload for `mimetype`. Binary formats are column-oriented;
+    a /data?since= dict is sent as its rows plus the other keys as meta.
+    """
+    if mimetype == MIME_JSON:
+        return dumps_json(payload)
+
+    if isinstance(payload, dict):
+        meta = {k: v for k, v in payload.items() if k != "rows"}
+        rows = payload.get("rows", [])
+    else:
+        meta, rows = {}, payload
+
+    if mimetype == MIME_MSGPACK:
+        return encode_msgpack(rows, meta)
+    return encode_columnar(rows, meta)
+
+
+# ---------------- COMPRESSION ----------------
+
+COMPRESSORS = {
+    "gzip": lambda raw: gzip.compress(raw, compresslevel=5),
+    "deflate": lambda raw: zlib.compress(raw, 5),
+}
@@ -4,3 +4,9 @@ export const fetchLogs = async () => {
     const res = await fetch(`${API_BASE_URL}/logs`);
     return res.json();
 };
+
+// Entries after `cursor` ({ cursor, truncated, logs }); truncated means start over
+export const fetchLogChanges = async (cursor = 0) => {
+    const res = await fetch(`${API_BASE_URL}/logs?since=${cursor}`);
+    return res.json();
+};
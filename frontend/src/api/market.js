@@ -5,6 +5,12 @@ export async function fetchMarketData() {
     return res.json();
 }
 
+// Incremental poll: rows changed since `cursor` (full snapshot when cursor is stale)
+export async function fetchMarketChanges(cursor = 0) {
+    const res = await fetch(`${API_BASE_URL}/data?since=${cursor}`);
+    return res.json();
+}
+
 export async function setTimeRange(start, end) {
     const res = await fetch(`${API_BASE_URL}/set-time-range`, {
         method: "POST",
@@ -38,7 +44,9 @@ export async function addStock(symbol, days = 30) {
     return res.json();
 }
 
-export async function fetchAvailableSymbols() {
-    const res = await fetch(`${API_BASE_URL}/available-symbols`);
+// Server-side search over the symbol universe; returns one page of matches
+export async function fetchAvailableSymbols({ q = '', limit = 60, offset = 0, fuzzy = true } = {}) {
+    const params = new URLSearchParams({ q, limit, offset, fuzzy: fuzzy ? '1' : '0' });
+    const res = await fetch(`${API_BASE_URL}/available-symbols?${params}`);
     return res.json();
 }
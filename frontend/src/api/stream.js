@@ -0,0 +1,38 @@
+import { API_BASE_URL } from '../config';
+
+// One shared EventSource per tab, opened on first subscriber and closed on last
+let source = null;
+const listeners = new Map(); // event -> Set(handler)
+
+export const streamSupported = typeof EventSource !== 'undefined';
+
+const openSource = () => {
+    source = new EventSource(`${API_BASE_URL}/stream`);
+    listeners.forEach((handlers, event) => attach(event));
+};
+
+const attach = (event) => {
+    source.addEventListener(event, (e) => {
+        const payload = JSON.parse(e.data);
+        (listeners.get(event) || []).forEach(handler => handler(payload));
+    });
+};
+
+export const subscribeStream = (event, handler) => {
+    if (!listeners.has(event)) {
+        listeners.set(event, new Set());
+        if (source) attach(event);
+    }
+    listeners.get(event).add(handler);
+    if (!source) openSource();
+
+    return () => {
+        listeners.get(event).delete(handler);
+        const remaining = Array.from(listeners.values()).some(set => set.size > 0);
+        if (!remaining && source) {
+            source.close();
+            source = null;
+            listeners.clear();
+        }
+    };
+};
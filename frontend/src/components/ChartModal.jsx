@@ -30,8 +30,9 @@ const ChartModal = ({ symbol, onClose }) => {
             priceFormat: { type: 'volume' },
         });
 
-        // Fetch historical data
-        fetch(`${API_BASE_URL}/historical/${symbol}`)
+        // Fetch historical data, downsampled server-side to roughly one point per pixel
+        const maxPoints = Math.max(200, chartContainerRef.current.clientWidth);
+        fetch(`${API_BASE_URL}/historical/${symbol}?max_points=${maxPoints}`)
             .then(res => res.json())
             .then(data => {
                 if (Array.isArray(data)) {
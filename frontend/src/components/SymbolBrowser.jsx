@@ -1,43 +1,44 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { fetchAvailableSymbols } from '../api/market';
 
+const PAGE_SIZE = 60;
+const SEARCH_DEBOUNCE_MS = 250;
+
 const SymbolBrowser = ({ onClose, onSelect }) => {
-    const [symbols, setSymbols] = useState([]);
     const [filteredSymbols, setFilteredSymbols] = useState([]);
+    const [total, setTotal] = useState(0);
+    const [hasMore, setHasMore] = useState(false);
     const [searchQuery, setSearchQuery] = useState('');
     const [loading, setLoading] = useState(true);
+    const requestId = useRef(0);
 
+    // Search on the server (debounced); only the first page is fetched
     useEffect(() => {
-        loadSymbols();
-    }, []);
+        const timer = setTimeout(() => loadSymbols(searchQuery, 0), SEARCH_DEBOUNCE_MS);
+        return () => clearTimeout(timer);
+    }, [searchQuery]);
 
-    useEffect(() => {
-        if (searchQuery.trim() === '') {
-            setFilteredSymbols(symbols);
-        } else {
-            const query = searchQuery.toUpperCase();
-            const filtered = symbols.filter(s =>
-                s.symbol.includes(query) ||
-                (s.name && s.name.toUpperCase().includes(query))
-            );
-            setFilteredSymbols(filtered);
-        }
-    }, [searchQuery, symbols]);
-
-    const loadSymbols = async () => {
+    const loadSymbols = async (query, offset) => {
+        const id = ++requestId.current;
+        setLoading(true);
         try {
-            const res = await fetchAvailableSymbols();
+            const res = await fetchAvailableSymbols({ q: query.trim(), limit: PAGE_SIZE, offset });
+            // Ignore responses for queries the user has already typed past
+            if (id !== requestId.current) return;
             if (res.status === 'ok') {
-                setSymbols(res.symbols);
-                setFilteredSymbols(res.symbols);
+                setFilteredSymbols(prev => offset === 0 ? res.symbols : [...prev, ...res.symbols]);
+                setTotal(res.count);
+                setHasMore(res.has_more);
             }
         } catch (error) {
             console.error('Failed to load symbols:', error);
         } finally {
-            setLoading(false);
+            if (id === requestId.current) setLoading(false);
         }
     };
 
+    const loadMore = () => loadSymbols(searchQuery, filteredSymbols.length);
+
     const handleSelect = (symbol) => {
         onSelect(symbol.symbol);
         onClose();
@@ -94,7 +95,7 @@ const SymbolBrowser = ({ onClose, onSelect }) => {
                         >×</button>
                     </div>
                     <p style={{ margin: '0 0 16px 0', fontSize: '0.9rem', color: '#94a3b8' }}>
-                        {loading ? 'Loading symbols...' : `${filteredSymbols.length} symbols available`}
+                        {loading && filteredSymbols.length === 0 ? 'Loading symbols...' : `${total} symbols available`}
                     </p>
 
                     {/* Search Bar */}
@@ -130,7 +131,7 @@ const SymbolBrowser = ({ onClose, onSelect }) => {
                         padding: '8px'
                     }}
                 >
-                    {loading ? (
+                    {loading && filteredSymbols.length === 0 ? (
                         <div style={{ textAlign: 'center', padding: '40px', color: '#94a3b8' }}>
                             Loading symbols...
                         </div>
@@ -173,6 +174,25 @@ const SymbolBrowser = ({ onClose, onSelect }) => {
                             ))}
                         </div>
                     )}
+                    {hasMore && (
+                        <button
+                            onClick={loadMore}
+                            disabled={loading}
+                            style={{
+                                display: 'block',
+                                margin: '12px auto 4px',
+                                background: 'rgba(59, 130, 246, 0.15)',
+                                border: '1px solid rgba(59, 130, 246, 0.3)',
+                                borderRadius: '6px',
+                                padding: '8px 16px',
+                                color: '#93c5fd',
+                                fontSize: '0.85rem',
+                                cursor: loading ? 'wait' : 'pointer'
+                            }}
+                        >
+                            {loading ? 'Loading...' : `Load more (${total - filteredSymbols.length} remaining)`}
+                        </button>
+                    )}
                 </div>
             </div>
         </div>
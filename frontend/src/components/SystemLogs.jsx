@@ -30,7 +30,7 @@ const SystemLogs = () => {
             <div className="panel-header">System Logs</div>
             <div className="logs-content" ref={containerRef}>
                 {[...logs].reverse().map((log, index) => (
-                    <div key={index} className={`log-entry ${getLogClass(log.message)}`}>
+                    <div key={log.seq ?? index} className={`log-entry ${getLogClass(log.message)}`}>
                         [{log.time}] {log.message}
                     </div>
                 ))}
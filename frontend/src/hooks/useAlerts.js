@@ -1,10 +1,15 @@
 import { useState, useEffect } from 'react';
 import { fetchActiveAlerts } from '../api/alerts';
+import { streamSupported, subscribeStream } from '../api/stream';
 
 const useAlerts = () => {
     const [alerts, setAlerts] = useState([]);
 
     useEffect(() => {
+        if (streamSupported) {
+            return subscribeStream('alerts', setAlerts);
+        }
+
         const loadAlerts = async () => {
             const result = await fetchActiveAlerts();
             setAlerts(result);
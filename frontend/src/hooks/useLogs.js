@@ -1,13 +1,37 @@
 import { useState, useEffect } from 'react';
-import { fetchLogs } from '../api/logs';
+import { fetchLogChanges } from '../api/logs';
+import { streamSupported, subscribeStream } from '../api/stream';
+
+const MAX_LOGS = 300;
 
 const useLogs = () => {
     const [logs, setLogs] = useState([]);
 
     useEffect(() => {
+        if (streamSupported) {
+            const offSnapshot = subscribeStream('logs', setLogs);
+            const offEntry = subscribeStream('log', (entry) => {
+                setLogs(prev => {
+                    // Skip entries already included in the snapshot
+                    if (prev.length && prev[prev.length - 1].seq >= entry.seq) return prev;
+                    return [...prev, entry].slice(-MAX_LOGS);
+                });
+            });
+            return () => {
+                offSnapshot();
+                offEntry();
+            };
+        }
+
+        let cursor = 0;
         const loadLogs = async () => {
-            const result = await fetchLogs();
-            setLogs(result);
+            const result = await fetchLogChanges(cursor);
+            cursor = result.cursor;
+            if (result.truncated) {
+                setLogs(result.logs);
+            } else if (result.logs.length) {
+                setLogs(prev => [...prev, ...result.logs].slice(-MAX_LOGS));
+            }
         };
 
         loadLogs(); // Initial load
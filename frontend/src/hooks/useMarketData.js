@@ -1,13 +1,39 @@
 import { useState, useEffect } from 'react';
-import { fetchMarketData } from '../api/market';
+import { fetchMarketChanges } from '../api/market';
+import { streamSupported, subscribeStream } from '../api/stream';
 
 const useMarketData = () => {
     const [data, setData] = useState([]);
 
     useEffect(() => {
+        let cursor = 0;
+        let rowsBySymbol = new Map();
+        let inFlight = false;
+
+        // Same payload from /data?since= and the "rows" stream event
+        const applyChanges = (result) => {
+            if (result.full) rowsBySymbol = new Map();
+            result.rows.forEach(row => rowsBySymbol.set(row.symbol, row));
+            result.removed.forEach(symbol => rowsBySymbol.delete(symbol));
+            cursor = result.cursor;
+
+            if (result.full || result.rows.length || result.removed.length) {
+                setData(Array.from(rowsBySymbol.values()));
+            }
+        };
+
+        if (streamSupported) {
+            return subscribeStream('rows', applyChanges);
+        }
+
         const loadData = async () => {
-            const result = await fetchMarketData();
-            setData(result);
+            if (inFlight) return; // Don't let a slow response rewind the cursor
+            inFlight = true;
+            try {
+                applyChanges(await fetchMarketChanges(cursor));
+            } finally {
+                inFlight = false;
+            }
         };
 
         loadData(); // Initial load